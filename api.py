@@ -1,25 +1,51 @@
+import asyncio
+import base64
+import json
 import logging
-from fastapi import FastAPI, HTTPException
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
+from config.settings import settings
+from pipeline.admission import LANES, AdmissionController, AdmissionRejected
 from pipeline.agent import ExtractionAgent
+from pipeline.dynamodb_store import SUMMARY_ATTRIBUTES
+from pipeline.job_runner import JobQueueFull, JobRunner
+from pipeline.job_store import JobStore, TERMINAL_STATUSES
+from pipeline.logging_config import configure_logging, dropped_records, shutdown_logging
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+agent = ExtractionAgent()
+job_store = JobStore()
+admission = AdmissionController()
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    job_runner.shutdown(wait=True)
+    job_store.close()
+    shutdown_logging()
+
+
 app = FastAPI(
     title="Loan Document Extraction API",
     description="Extract structured data from loan documents using AI",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
-agent = ExtractionAgent()
-
 
 class ExtractionRequest(BaseModel):
     """Pydantic model - validates incoming requests."""
     document_id: str
     document_type: Optional[str] = None
+    profile: bool = False
+    priority: Optional[str] = None
 
 
 class FieldResult(BaseModel):
@@ -37,6 +63,93 @@ class ExtractionResponse(BaseModel):
     valid: bool
     errors: list = []
     fields: dict = {}
+    profile: Optional[dict] = None
+    duplicate_of: Optional[str] = None
+    segments: list = []
+
+
+class BatchRequest(BaseModel):
+    """Pydantic model - a batch of documents to extract asynchronously."""
+    documents: List[ExtractionRequest]
+
+
+class JobSubmission(BaseModel):
+    """Pydantic model - returned as soon as a job is queued."""
+    job_id: str
+    document_id: str
+    status: str
+
+
+class BatchSubmission(BaseModel):
+    """Pydantic model - queued jobs and documents rejected because the queue was full."""
+    jobs: List[JobSubmission] = []
+    rejected: List[str] = []
+
+
+class ResultsPage(BaseModel):
+    """Pydantic model - one page of stored results and the cursor for the next page."""
+    items: list = []
+    next_cursor: Optional[str] = None
+
+
+class JobStatus(BaseModel):
+    """Pydantic model - job progress and, once finished, its result."""
+    job_id: str
+    document_id: str
+    status: str
+    current_step: Optional[str] = None
+    steps: list = []
+    result: Optional[ExtractionResponse] = None
+    error: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
+def build_response(state):
+    """Map a finished pipeline state to the API response model."""
+    return ExtractionResponse(
+        document_id=state["document_id"],
+        status=state["status"],
+        loan_type=state["final_result"].get("loan_type", "unknown"),
+        valid=state["validation"]["valid"],
+        errors=state["validation"]["errors"],
+        fields=state.final_fields(),
+        profile=state["monitoring"].get("profile"),
+        duplicate_of=state.get("duplicate_of"),
+        segments=state.segment_summaries()
+    )
+
+
+def resolve_priority(requested, header, default):
+    """Priority lane from the request body, then the X-Priority header, then the endpoint default."""
+    lane = (requested or header or default).lower()
+    if lane not in LANES:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(LANES)}")
+    return lane
+
+
+def encode_cursor(key):
+    """Opaque page cursor from a DynamoDB LastEvaluatedKey."""
+    if key is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def busy(e, retry_after):
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(retry_after)})
+
+
+job_runner = JobRunner(agent, job_store, serialize=lambda state: build_response(state).model_dump(),
+                       admission=admission)
 
 
 @app.get("/health")
@@ -45,23 +158,141 @@ def health_check():
     return {"status": "healthy", "version": "2.0.0"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Queue depth, in-flight work and rejections in Prometheus text format, for autoscaling."""
+    stats = admission.stats()
+    jobs = job_runner.stats()
+    lines = [
+        "# TYPE extraction_in_flight gauge",
+        *(f'extraction_in_flight{{lane="{lane}"}} {count}' for lane, count in stats["in_flight"].items()),
+        "# TYPE extraction_queued gauge",
+        *(f'extraction_queued{{lane="{lane}"}} {count}' for lane, count in stats["queued"].items()),
+        "# TYPE extraction_admitted_total counter",
+        *(f'extraction_admitted_total{{lane="{lane}"}} {count}' for lane, count in stats["admitted"].items()),
+        "# TYPE extraction_rejected_total counter",
+        *(f'extraction_rejected_total{{lane="{key.split(":")[0]}",reason="{key.split(":")[1]}"}} {count}'
+          for key, count in stats["rejected"].items()),
+        "# TYPE extraction_max_in_flight gauge",
+        f"extraction_max_in_flight {stats['max_in_flight']}",
+        "# TYPE extraction_service_seconds_avg gauge",
+        f"extraction_service_seconds_avg {stats['avg_service_seconds']}",
+        "# TYPE extraction_jobs_queued gauge",
+        f"extraction_jobs_queued {jobs['queued']}",
+        "# TYPE extraction_jobs_running gauge",
+        f"extraction_jobs_running {jobs['running']}",
+        "# TYPE extraction_jobs_capacity gauge",
+        f"extraction_jobs_capacity {jobs['capacity']}",
+        "# TYPE extraction_log_records_dropped_total counter",
+        f"extraction_log_records_dropped_total {dropped_records()}"
+    ]
+    return "\n".join(lines) + "\n"
+
+
 @app.post("/extract", response_model=ExtractionResponse)
-def extract_document(request: ExtractionRequest):
-    """Extract fields from a loan document."""
+def extract_document(request: ExtractionRequest, x_priority: Optional[str] = Header(None)):
+    """Extract fields from a loan document; 429 with Retry-After when the server is saturated."""
+    lane = resolve_priority(request.priority, x_priority, "interactive")
     try:
-        logger.info(f"API request: extract {request.document_id}")
-        state = agent.run(request.document_id)
-
-        return ExtractionResponse(
-            document_id=state["document_id"],
-            status=state["status"],
-            loan_type=state["final_result"].get("loan_type", "unknown"),
-            valid=state["validation"]["valid"],
-            errors=state["validation"]["errors"],
-            fields=state["final_result"]
-        )
+        logger.info("API request: extract %s (%s)", request.document_id, lane)
+        # A profiled run goes alone, so its profile holds no other request and slows none down
+        with admission.admit(lane, exclusive=request.profile):
+            state = agent.run(request.document_id, profile=request.profile)
+        return build_response(state)
+    except AdmissionRejected as e:
+        raise busy(e, e.retry_after)
     except Exception as e:
-        logger.error(f"Extraction failed: {e}")
+        logger.error("Extraction failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/results", response_model=ResultsPage)
+def list_results(status: str, limit: int = Query(50, ge=1, le=1000), cursor: Optional[str] = None,
+                 attributes: Optional[str] = None, since: Optional[str] = None):
+    """Stored results with a status (e.g. needs_review), newest first, from the status index.
+
+    Returns only the summary attributes unless `attributes` (comma-separated,
+    `fields` for the full extraction) asks for others.
+    """
+    names = [name.strip() for name in attributes.split(",") if name.strip()] if attributes else SUMMARY_ATTRIBUTES
+    try:
+        items, next_key = agent.db.query_by_status(status, limit, decode_cursor(cursor), names, since)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Results query failed: %s", e)
+        raise HTTPException(status_code=503, detail=str(e))
+    return ResultsPage(items=items, next_cursor=encode_cursor(next_key))
+
+
+@app.post("/jobs", response_model=JobSubmission, status_code=202)
+def submit_job(request: ExtractionRequest, x_priority: Optional[str] = Header(None)):
+    """Queue a document for background extraction and return its job id immediately."""
+    lane = resolve_priority(request.priority, x_priority, "backfill")
+    try:
+        job = job_runner.submit(request.document_id, profile=request.profile, priority=lane)
+    except JobQueueFull as e:
+        raise busy(e, admission.retry_after())
+    return JobSubmission(**job)
+
+
+@app.post("/jobs/batch", response_model=BatchSubmission, status_code=202)
+def submit_batch(request: BatchRequest, x_priority: Optional[str] = Header(None)):
+    """Queue many documents; those that do not fit in the queue are returned as rejected."""
+    submission = BatchSubmission()
+    for document in request.documents:
+        lane = resolve_priority(document.priority, x_priority, "backfill")
+        try:
+            job = job_runner.submit(document.document_id, profile=document.profile, priority=lane)
+            submission.jobs.append(JobSubmission(**job))
+        except JobQueueFull:
+            submission.rejected.append(document.document_id)
+    logger.info("Batch: %d queued, %d rejected", len(submission.jobs), len(submission.rejected))
+    return submission
+
+
+@app.get("/jobs/{job_id}", response_model=JobStatus)
+def get_job(job_id: str):
+    """Job status, current pipeline step, step history and the final result."""
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return JobStatus(**job, steps=job_store.steps(job_id))
+
+
+async def _job_events(job_id, request):
+    """Server-sent events: one 'step' event per step update, then a final status event.
+
+    Polls without holding a thread. The stream ends when the client
+    disconnects, or after JOB_EVENT_MAX_SECONDS with a 'timeout' event
+    carrying the current status (the client can reconnect or poll).
+    """
+    config = settings.jobs
+    deadline = time.monotonic() + config.event_stream_max_seconds
+    last_seq = 0
+    while True:
+        job = await asyncio.to_thread(job_store.get, job_id)
+        if job is None:
+            return
+        for event in await asyncio.to_thread(job_store.steps, job_id, last_seq):
+            last_seq = event["seq"]
+            yield f"event: step\ndata: {json.dumps(event)}\n\n"
+        if job["status"] in TERMINAL_STATUSES:
+            final = {"status": job["status"], "result": job["result"], "error": job["error"]}
+            yield f"event: {job['status']}\ndata: {json.dumps(final)}\n\n"
+            return
+        if time.monotonic() >= deadline:
+            yield f"event: timeout\ndata: {json.dumps({'status': job['status']})}\n\n"
+            return
+        if await request.is_disconnected():
+            return
+        await asyncio.sleep(config.event_poll_seconds)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request):
+    """Stream step completions for a job as server-sent events."""
+    if await asyncio.to_thread(job_store.get, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return StreamingResponse(_job_events(job_id, request), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
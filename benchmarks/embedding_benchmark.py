@@ -0,0 +1,172 @@
+"""Retrieval quality and speed of the embedding backends and stored precisions.
+
+Every backend embeds the RAG chunks of the same synthetic loan documents. Each
+(backend, precision) pair is compared against the float32 model with float32
+storage (the reference). Reported per pair:
+- agreement@k: overlap of its top-k chunks with the reference top-k
+- hit@k: how often the top-k holds the chunk with the asked-for field's label
+- the mean score error against the reference scores
+- bytes stored per embedding
+Per backend the run also reports chunk encode throughput and the latency of a
+single query embedding.
+
+    python -m benchmarks.embedding_benchmark
+    python -m benchmarks.embedding_benchmark --backends float32,int8 --precisions float32,float16,int8 --documents 6
+"""
+import argparse
+import logging
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import environment_info, latency_summary, save_json
+from pipeline.agent import RAG_QUERY
+from pipeline.embeddings import BACKENDS, PRECISIONS, StoredEmbeddings, create_backend
+from pipeline.synthetic_documents import LOAN_PROFILES, SyntheticLoanDocument
+
+logger = logging.getLogger(__name__)
+
+# (question, label of the line that answers it)
+QUERIES = [
+    ("Who is the borrower?", "Borrower:"),
+    ("What is the loan amount?", "Loan Amount:"),
+    ("What is the interest rate?", "Interest Rate:"),
+    ("How many months is the loan term?", "Term:"),
+    ("What is the monthly payment?", "Monthly Payment:"),
+    (RAG_QUERY, "Loan Amount:")
+]
+
+
+def build_corpus(documents, pages, noise):
+    """RAG chunks of `documents` synthetic documents, spread over the loan types."""
+    from pipeline.rag_retriever import text_splitter
+    from pipeline.text_cleaner import TextCleaner
+
+    splitter = text_splitter()
+    cleaner = TextCleaner()
+    loan_types = list(LOAN_PROFILES)
+    corpus = []
+    for index in range(documents):
+        document = SyntheticLoanDocument(loan_types[index % len(loan_types)], pages=pages,
+                                         seed=index // len(loan_types), noise=noise)
+        corpus.append(splitter.split_text(cleaner.clean(document.text())))
+    return corpus
+
+
+def _top_k(scores, k):
+    return set(np.argsort(scores)[-k:].tolist())
+
+
+def time_backend(backend, chunks, questions, iterations):
+    """(chunks encoded per second, single-query latencies in ms)."""
+    backend.encode(chunks[:backend.batch_size])
+    started = time.perf_counter()
+    for _ in range(iterations):
+        backend.encode(chunks)
+    chunks_per_second = len(chunks) * iterations / (time.perf_counter() - started)
+
+    latencies = []
+    for _ in range(iterations):
+        for question in questions:
+            call_start = time.perf_counter()
+            backend.encode([question])
+            latencies.append((time.perf_counter() - call_start) * 1000)
+    return chunks_per_second, latencies
+
+
+def score_precision(corpus, document_embeddings, query_embeddings, precision, reference, top_k):
+    """Quality of one backend's embeddings stored at `precision`, against the reference scores."""
+    agreement, errors, hits, labelled, nbytes, rows = [], [], 0, 0, 0, 0
+    for chunks, embeddings, expected_scores in zip(corpus, document_embeddings, reference):
+        stored = StoredEmbeddings(embeddings, precision)
+        nbytes += stored.nbytes
+        rows += len(stored)
+        for query, expected, (_, label) in zip(query_embeddings, expected_scores, QUERIES):
+            scores = stored.scores(query)
+            top = _top_k(scores, top_k)
+            agreement.append(len(top & _top_k(expected, top_k)) / min(top_k, len(chunks)))
+            errors.append(float(np.abs(scores - expected).mean()))
+            answers = {i for i, chunk in enumerate(chunks) if label.lower() in chunk.lower()}
+            if answers:
+                labelled += 1
+                hits += bool(top & answers)
+    return {
+        f"agreement_at_{top_k}": round(float(np.mean(agreement)), 4),
+        f"hit_at_{top_k}": round(hits / labelled, 4) if labelled else None,
+        "mean_score_error": round(float(np.mean(errors)), 6),
+        "bytes_per_embedding": round(nbytes / rows, 1)
+    }
+
+
+def run_benchmark(corpus, backend_names, precisions, top_k, iterations, model_name=None):
+    all_chunks = [chunk for chunks in corpus for chunk in chunks]
+    questions = [question for question, _ in QUERIES]
+    results = []
+    reference = None
+
+    # float32 runs first (even when not reported): its float32 scores are the reference
+    for backend_name in ["float32"] + [name for name in backend_names if name != "float32"]:
+        backend = create_backend(backend_name, model_name)
+        query_embeddings = backend.encode(questions)
+        document_embeddings = [backend.encode(chunks) for chunks in corpus]
+        if reference is None:
+            reference = [list(query_embeddings @ embeddings.T) for embeddings in document_embeddings]
+        if backend_name not in backend_names:
+            continue
+
+        chunks_per_second, latencies = time_backend(backend, all_chunks, questions, iterations)
+        for precision in precisions:
+            result = {"backend": backend_name, "precision": precision, "chunks": len(all_chunks)}
+            result.update(score_precision(corpus, document_embeddings, query_embeddings, precision, reference, top_k))
+            result["encode_chunks_s"] = round(chunks_per_second, 1)
+            result["query_latency"] = latency_summary(latencies)
+            results.append(result)
+            print(f"{backend_name:<8} {precision:<8} agreement@{top_k} {result[f'agreement_at_{top_k}']:>6.3f}  "
+                  f"hit@{top_k} {result[f'hit_at_{top_k}'] or 0:>6.3f}  score err {result['mean_score_error']:>9.6f}  "
+                  f"{result['bytes_per_embedding']:>7.1f} B/emb  {result['encode_chunks_s']:>8.1f} chunks/s  "
+                  f"query p50 {result['query_latency']['p50_ms']:>7.2f}ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare embedding backends and stored precisions on synthetic loan text")
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated embedding backends")
+    parser.add_argument("--precisions", default=",".join(PRECISIONS), help="comma-separated stored precisions")
+    parser.add_argument("--documents", type=int, default=12, help="synthetic documents, spread over the loan types")
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--noise", type=float, default=0.05, help="fraction of OCR lines with noise")
+    parser.add_argument("--top-k", type=int, default=3, help="chunks retrieved per query (RAGRetriever uses 3)")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--model", help="override EMBEDDING_MODEL")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level)
+    backends = [name for name in args.backends.split(",") if name]
+    precisions = [name for name in args.precisions.split(",") if name]
+    unknown = (set(backends) - set(BACKENDS)) | (set(precisions) - set(PRECISIONS))
+    if unknown:
+        parser.error(f"unknown backends or precisions: {sorted(unknown)}")
+
+    config = {
+        "backends": backends,
+        "precisions": precisions,
+        "documents": args.documents,
+        "pages": args.pages,
+        "noise": args.noise,
+        "top_k": args.top_k,
+        "iterations": args.iterations,
+        "model": args.model
+    }
+    corpus = build_corpus(args.documents, args.pages, args.noise)
+    results = run_benchmark(corpus, backends, precisions, args.top_k, args.iterations, args.model)
+    if args.output:
+        save_json(args.output, {"environment": environment_info(), "config": config, "results": results})
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
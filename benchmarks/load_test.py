@@ -0,0 +1,274 @@
+"""Open-loop load generator for the extraction API.
+
+Starts the FastAPI app in-process (or targets --url), offers requests at fixed
+Poisson arrival rates and reports throughput, latency percentiles, error rate
+and the saturation point. Latency is measured from each request's scheduled
+arrival time, so client-side queueing under overload is counted. With
+--endpoint /jobs/batch each arrival submits --batch-size documents and counts as
+done when all of their jobs have finished. The in-process server runs with
+duplicate reuse off, as run_benchmarks does; start a --url target with
+DEDUP_ENABLED=false, or cycled documents are answered from the duplicate index.
+
+    SIMULATE_BACKENDS=true python -m benchmarks.load_test --rates 1,2,4,8 --duration 30 --label w1
+    python -m benchmarks.load_test --url http://localhost:8000 --label w4 --rates 5,10,20
+    python -m benchmarks.load_test --endpoint /jobs/batch --batch-size 20 --rates 0.5,1 --label batch
+    python -m benchmarks.load_test --compare benchmarks/results/load-w1.json benchmarks/results/load-w4.json
+"""
+import argparse
+import logging
+import random
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from benchmarks.common import environment_info, latency_summary, load_json, save_json
+from pipeline.synthetic_documents import LOAN_PROFILES, synthetic_document_id
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessServer:
+    """Runs the API with uvicorn on a background thread and a free local port."""
+
+    def __init__(self, app_path="api:app"):
+        import uvicorn
+        from config.settings import settings
+
+        # Documents are cycled, so duplicate reuse would measure cache hits, not extraction
+        settings.dedup.enabled = False
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        config = uvicorn.Config(app_path, host="127.0.0.1", port=self.port, log_level="warning")
+        self.server = uvicorn.Server(config)
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 120
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("In-process API server did not start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+        return False
+
+
+class LoadGenerator:
+    """Issues requests at scheduled arrival times regardless of completions (open loop)."""
+
+    def __init__(self, base_url, endpoint, document_ids, timeout_s, max_outstanding, priority=None, batch_size=1):
+        self.base_url = base_url.rstrip("/")
+        self.endpoint = endpoint
+        self.batch_size = batch_size if endpoint == "/jobs/batch" else 1
+        self.headers = {"X-Priority": priority} if priority else {}
+        self.document_ids = document_ids
+        self.timeout_s = timeout_s
+        self.pool = ThreadPoolExecutor(max_workers=max_outstanding)
+        self._local = threading.local()
+
+    def _session(self):
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _wait_for_job(self, job_id, deadline):
+        """Poll an async job until it finishes; 200 if it succeeded."""
+        while time.perf_counter() < deadline:
+            response = self._session().get(f"{self.base_url}/jobs/{job_id}", timeout=self.timeout_s)
+            if response.status_code != 200:
+                return f"job_{response.status_code}"
+            job = response.json()
+            if job["status"] == "succeeded":
+                return 200
+            if job["status"] == "failed":
+                return "job_failed"
+            time.sleep(0.05)
+        return "job_timeout"
+
+    def _wait_for_batch(self, submission, deadline):
+        """Poll every job of a batch until all finish; 200 if all were queued and succeeded."""
+        if submission["rejected"]:
+            return "batch_rejected"
+        for job in submission["jobs"]:
+            outcome = self._wait_for_job(job["job_id"], deadline)
+            if outcome != 200:
+                return outcome
+        return 200
+
+    def _send(self, scheduled_at, document_ids):
+        if self.endpoint == "/jobs/batch":
+            body = {"documents": [{"document_id": document_id} for document_id in document_ids]}
+        else:
+            body = {"document_id": document_ids[0]}
+        try:
+            response = self._session().post(f"{self.base_url}{self.endpoint}", json=body, headers=self.headers,
+                                            timeout=self.timeout_s)
+            outcome = response.status_code
+            # Async submissions count as done only when their jobs complete
+            if outcome == 202 and self.endpoint == "/jobs":
+                outcome = self._wait_for_job(response.json()["job_id"], scheduled_at + self.timeout_s)
+            elif outcome == 202 and self.endpoint == "/jobs/batch":
+                outcome = self._wait_for_batch(response.json(), scheduled_at + self.timeout_s)
+        except requests.RequestException as e:
+            outcome = type(e).__name__
+        return outcome, (time.perf_counter() - scheduled_at) * 1000
+
+    def run_step(self, rate, duration_s, seed):
+        """Offer `rate` requests/second for `duration_s` seconds and summarize the outcome."""
+        rng = random.Random(seed)
+        futures = []
+        started = time.perf_counter()
+        next_arrival = started
+        index = 0
+        while next_arrival - started < duration_s:
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            document_ids = [self.document_ids[(index * self.batch_size + offset) % len(self.document_ids)]
+                            for offset in range(self.batch_size)]
+            futures.append(self.pool.submit(self._send, next_arrival, document_ids))
+            index += 1
+            next_arrival += rng.expovariate(rate)
+
+        outcomes = [future.result() for future in futures]
+        elapsed = time.perf_counter() - started
+        statuses = Counter(str(status) for status, _ in outcomes)
+        ok_latencies = [latency for status, latency in outcomes if status == 200]
+        errors = len(outcomes) - len(ok_latencies)
+        return {
+            "offered_rps": rate,
+            "requests": len(outcomes),
+            "duration_s": round(elapsed, 3),
+            "throughput_rps": round(len(ok_latencies) / elapsed, 3),
+            "error_rate": round(errors / len(outcomes), 4) if outcomes else 0.0,
+            "statuses": dict(statuses),
+            "latency": latency_summary(ok_latencies)
+        }
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+
+def find_saturation(steps, slo_ms, max_error_rate):
+    """First offered rate the service could not keep up with, and the last one it could."""
+    sustained = None
+    for step in steps:
+        keeping_up = step["throughput_rps"] >= 0.9 * step["offered_rps"]
+        within_slo = step["latency"]["p99_ms"] <= slo_ms
+        if keeping_up and within_slo and step["error_rate"] <= max_error_rate:
+            sustained = step["offered_rps"]
+        else:
+            return {"saturated_at_rps": step["offered_rps"], "max_sustained_rps": sustained}
+    return {"saturated_at_rps": None, "max_sustained_rps": sustained}
+
+
+def print_comparison(paths):
+    reports = [load_json(path) for path in paths]
+    print(f"{'label':<16} {'rps':>7} {'tput':>8} {'p50ms':>9} {'p95ms':>9} {'p99ms':>9} {'err':>7}")
+    for report in reports:
+        for step in report["steps"]:
+            latency = step["latency"]
+            print(f"{report['label']:<16} {step['offered_rps']:>7.2f} {step['throughput_rps']:>8.2f} "
+                  f"{latency['p50_ms']:>9.1f} {latency['p95_ms']:>9.1f} {latency['p99_ms']:>9.1f} "
+                  f"{step['error_rate']:>7.2%}")
+        print(f"{report['label']:<16} max sustained: {report['saturation']['max_sustained_rps']} rps, "
+              f"saturated at: {report['saturation']['saturated_at_rps']} rps")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Open-loop load test for the extraction API")
+    parser.add_argument("--url", help="target a running server instead of starting one in-process")
+    parser.add_argument("--endpoint", default="/extract", choices=["/extract", "/jobs", "/jobs/batch"])
+    parser.add_argument("--batch-size", type=int, default=10, help="documents per /jobs/batch request")
+    parser.add_argument("--priority", choices=["interactive", "backfill"], help="X-Priority lane to send")
+    parser.add_argument("--rates", default="1,2,4,8", help="comma-separated offered rates (requests/second)")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per rate step")
+    parser.add_argument("--pages", default="1,5", help="comma-separated synthetic document sizes")
+    parser.add_argument("--loan-types", default=",".join(LOAN_PROFILES))
+    parser.add_argument("--timeout", type=float, default=120.0, help="per-request timeout in seconds")
+    parser.add_argument("--max-outstanding", type=int, default=512, help="client-side concurrent request cap")
+    parser.add_argument("--slo-ms", type=float, default=10000.0, help="p99 latency objective")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--stop-at-saturation", action="store_true", help="skip higher rates once saturated")
+    parser.add_argument("--label", default="default", help="name for this configuration, e.g. workers=4")
+    parser.add_argument("--output", help="results JSON (default benchmarks/results/load-<label>.json)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--compare", nargs="+", metavar="RESULTS", help="print saved results side by side")
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        print_comparison(args.compare)
+        return 0
+
+    logging.basicConfig(level=args.log_level)
+    document_ids = [
+        synthetic_document_id(loan_type, pages=int(pages), seed=seed, noise=0.05)
+        for pages in args.pages.split(",") for loan_type in args.loan_types.split(",") for seed in range(4)
+    ]
+    rates = [float(rate) for rate in args.rates.split(",")]
+
+    server = None if args.url else InProcessServer()
+    base_url = args.url
+    steps = []
+    try:
+        if server is not None:
+            server.__enter__()
+            base_url = server.url
+        generator = LoadGenerator(base_url, args.endpoint, document_ids, args.timeout, args.max_outstanding,
+                                  args.priority, args.batch_size)
+        for step_index, rate in enumerate(rates):
+            step = generator.run_step(rate, args.duration, seed=args.seed + step_index)
+            steps.append(step)
+            latency = step["latency"]
+            print(f"{rate:>7.2f} rps offered  {step['throughput_rps']:>7.2f} rps ok  "
+                  f"p50 {latency['p50_ms']:>9.1f}ms  p95 {latency['p95_ms']:>9.1f}ms  "
+                  f"p99 {latency['p99_ms']:>9.1f}ms  errors {step['error_rate']:.2%}")
+            if args.stop_at_saturation and find_saturation(steps, args.slo_ms, args.max_error_rate)["saturated_at_rps"]:
+                break
+        generator.close()
+    finally:
+        if server is not None:
+            server.__exit__(None, None, None)
+
+    saturation = find_saturation(steps, args.slo_ms, args.max_error_rate)
+    print(f"Max sustained: {saturation['max_sustained_rps']} rps, saturated at: {saturation['saturated_at_rps']} rps")
+
+    report = {
+        "label": args.label,
+        "environment": environment_info(),
+        "config": {
+            "target": args.url or "in-process",
+            "endpoint": args.endpoint,
+            "batch_size": generator.batch_size,
+            "rates": rates,
+            "duration_s": args.duration,
+            "pages": args.pages,
+            "slo_ms": args.slo_ms,
+            "max_error_rate": args.max_error_rate
+        },
+        "steps": steps,
+        "saturation": saturation
+    }
+    output = args.output or f"benchmarks/results/load-{args.label}.json"
+    save_json(output, report)
+    print(f"Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
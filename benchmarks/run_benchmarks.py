@@ -0,0 +1,251 @@
+"""End-to-end pipeline benchmark on synthetic loan documents.
+
+    python -m benchmarks.run_benchmarks --pages 1,10,100 --iterations 5
+    python -m benchmarks.run_benchmarks --save-baseline benchmarks/results/baseline.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/results/baseline.json --fail-on-regression
+"""
+import argparse
+import logging
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import environment_info, latency_summary, load_json, save_json
+from pipeline.synthetic_documents import LOAN_PROFILES, SyntheticLoanDocument
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["tables", "clean", "dedup", "classify", "rules", "rag", "llm", "consensus", "guardrails", "validate",
+          "agent"]
+
+
+class PipelineBench:
+    """Runs individual pipeline stages on prepared inputs."""
+
+    def __init__(self, stages):
+        from pipeline.table_stitcher import TableStitcher
+        from pipeline.text_cleaner import TextCleaner
+        from pipeline.classifier import DocumentClassifier
+        from pipeline.rule_engine import RuleEngine
+        from pipeline.llm_extractor import LLMExtractor
+        from pipeline.consensus import ConsensusChecker
+        from pipeline.guardrails import Guardrails
+        from pipeline.validator import Validator
+        from pipeline.dedup import DuplicateIndex
+
+        self.stages = stages
+        self.table_stitcher = TableStitcher
+        self.cleaner = TextCleaner()
+        self.classifier = DocumentClassifier()
+        self.rule_engine = RuleEngine()
+        self.llm_extractor = LLMExtractor()
+        self.consensus = ConsensusChecker()
+        self.guardrails = Guardrails()
+        self.validator = Validator()
+        self.dedup = DuplicateIndex()
+        self.rag = None
+        self.agent = None
+        if "rag" in stages:
+            from pipeline.rag_retriever import RAGRetriever
+            self.rag = RAGRetriever()
+        if "agent" in stages:
+            from pipeline.agent import ExtractionAgent
+            from pipeline.mock_textract import MockTextract
+            self.agent = ExtractionAgent()
+            # MockTextract serves generated blocks for synthetic document ids
+            self.agent.textract.client = MockTextract()
+            # Repeated iterations would otherwise measure duplicate reuse, not extraction
+            self.agent.dedup = None
+
+    def prepare(self, document):
+        """Run the pipeline once so every stage has realistic input."""
+        inputs = {"document": document, "raw_text": document.text()}
+        inputs["clean_text"] = self.cleaner.clean(inputs["raw_text"])
+        inputs["loan_type"] = self.classifier.classify(inputs["clean_text"])["loan_type"]
+        inputs["rule_result"] = self.rule_engine.extract(inputs["clean_text"], inputs["loan_type"])
+        inputs["rag_context"] = inputs["clean_text"][:1500]
+        inputs["llm_result"] = self.llm_extractor.extract(inputs["rag_context"])
+        inputs["final_result"] = self.consensus.check(inputs["rule_result"], inputs["llm_result"])
+        return inputs
+
+    def stage(self, name, inputs):
+        """Zero-argument callable that runs one stage on prepared inputs."""
+        if name == "tables":
+            return lambda: self.table_stitcher().stitch_blocks(inputs["document"].blocks())
+        if name == "clean":
+            return lambda: self.cleaner.clean(inputs["raw_text"])
+        if name == "dedup":
+            def dedup():
+                content_hash, signature = self.dedup.fingerprint(inputs["clean_text"])
+                return self.dedup.lookup(content_hash, signature)
+            return dedup
+        if name == "classify":
+            return lambda: self.classifier.classify(inputs["clean_text"])
+        if name == "rules":
+            return lambda: self.rule_engine.extract(inputs["clean_text"], inputs["loan_type"])
+        if name == "rag":
+            def rag():
+                self.rag.store_document(inputs["document"].document_id, inputs["clean_text"])
+                return self.rag.retrieve("borrower name loan amount interest rate term payment")
+            return rag
+        if name == "llm":
+            return lambda: self.llm_extractor.extract(inputs["rag_context"])
+        if name == "consensus":
+            return lambda: self.consensus.check(inputs["rule_result"], inputs["llm_result"])
+        if name == "guardrails":
+            return lambda: self.guardrails.check(inputs["final_result"], inputs["clean_text"])
+        if name == "validate":
+            return lambda: self.validator.validate(inputs["final_result"])
+        if name == "agent":
+            return lambda: self.agent.run(inputs["document"].document_id)
+        raise ValueError(f"Unknown stage: {name}")
+
+
+def _peak_memory_kb(fn):
+    """Peak traced allocation of one call, above what was allocated before it."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round((peak - before) / 1024, 1)
+
+
+def _retained_memory_kb(calls):
+    """Memory still held by the results of one call each, per call: the cost of keeping a batch resident."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        kept = [call() for call in calls]
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del kept
+    return round((after - before) / 1024 / len(calls), 1)
+
+
+def run_benchmarks(pages_list, loan_types, stages, iterations, warmup, noise, tables, docs_per_size):
+    bench = PipelineBench(stages)
+    results = []
+
+    for pages in pages_list:
+        documents = [
+            SyntheticLoanDocument(loan_type, pages=pages, seed=seed, noise=noise, tables=tables)
+            for loan_type in loan_types for seed in range(docs_per_size)
+        ]
+        prepared = [bench.prepare(document) for document in documents]
+        total_bytes = sum(len(inputs["raw_text"]) for inputs in prepared)
+
+        for stage_name in stages:
+            calls = [bench.stage(stage_name, inputs) for inputs in prepared]
+            for _ in range(warmup):
+                for call in calls:
+                    call()
+
+            latencies = []
+            started = time.perf_counter()
+            for _ in range(iterations):
+                for call in calls:
+                    call_start = time.perf_counter()
+                    call()
+                    latencies.append((time.perf_counter() - call_start) * 1000)
+            elapsed = time.perf_counter() - started
+
+            runs = iterations * len(calls)
+            result = {
+                "stage": stage_name,
+                "pages": pages,
+                "documents": len(calls),
+                "runs": runs,
+                "latency": latency_summary(latencies),
+                "throughput_docs_s": round(runs / elapsed, 3),
+                "throughput_pages_s": round(runs * pages / elapsed, 3),
+                "throughput_mb_s": round(iterations * total_bytes / elapsed / 1e6, 3),
+                "peak_memory_kb": max(_peak_memory_kb(call) for call in calls),
+                "retained_kb_per_doc": _retained_memory_kb(calls)
+            }
+            results.append(result)
+            print(f"{stage_name:<11} {pages:>5}p  p50 {result['latency']['p50_ms']:>10.3f}ms  "
+                  f"p95 {result['latency']['p95_ms']:>10.3f}ms  p99 {result['latency']['p99_ms']:>10.3f}ms  "
+                  f"{result['throughput_pages_s']:>12.1f} pages/s  peak {result['peak_memory_kb']:>10.1f} KB  "
+                  f"retained {result['retained_kb_per_doc']:>8.1f} KB/doc")
+    return results
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Print per-stage deltas against a baseline and return the regressions."""
+    previous = {(row["stage"], row["pages"]): row for row in baseline["results"]}
+    regressions = []
+    print(f"\n=== COMPARISON (tolerance {tolerance:.0%}) ===")
+    for row in results:
+        old = previous.get((row["stage"], row["pages"]))
+        if old is None:
+            continue
+        old_p50, new_p50 = old["latency"]["p50_ms"], row["latency"]["p50_ms"]
+        old_tput, new_tput = old["throughput_pages_s"], row["throughput_pages_s"]
+        latency_change = (new_p50 - old_p50) / old_p50 if old_p50 else 0.0
+        throughput_change = (new_tput - old_tput) / old_tput if old_tput else 0.0
+        regressed = latency_change > tolerance or throughput_change < -tolerance
+        marker = "REGRESSION" if regressed else "ok"
+        print(f"{row['stage']:<11} {row['pages']:>5}p  p50 {latency_change:+8.1%}  "
+              f"throughput {throughput_change:+8.1%}  {marker}")
+        if regressed:
+            regressions.append({"stage": row["stage"], "pages": row["pages"],
+                                "p50_change": latency_change, "throughput_change": throughput_change})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the extraction pipeline on synthetic loan documents")
+    parser.add_argument("--pages", default="1,10,100", help="comma-separated document sizes in pages (1-1000)")
+    parser.add_argument("--loan-types", default=",".join(LOAN_PROFILES), help="comma-separated loan types")
+    parser.add_argument("--stages", default=",".join(STAGES), help="comma-separated stages to run")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--docs-per-size", type=int, default=1, help="documents per loan type and size")
+    parser.add_argument("--noise", type=float, default=0.05, help="fraction of OCR lines with noise")
+    parser.add_argument("--no-tables", action="store_true", help="omit amortization schedule tables")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--save-baseline", help="write results JSON as the new baseline")
+    parser.add_argument("--baseline", help="compare against this baseline JSON")
+    parser.add_argument("--tolerance", type=float, default=0.20, help="allowed relative slowdown")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--log-level", default="ERROR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level)
+    stages = [stage for stage in args.stages.split(",") if stage]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stages: {sorted(unknown)}")
+
+    config = {
+        "pages": [int(pages) for pages in args.pages.split(",")],
+        "loan_types": args.loan_types.split(","),
+        "stages": stages,
+        "iterations": args.iterations,
+        "warmup": args.warmup,
+        "docs_per_size": args.docs_per_size,
+        "noise": args.noise,
+        "tables": not args.no_tables
+    }
+    results = run_benchmarks(config["pages"], config["loan_types"], stages, args.iterations,
+                             args.warmup, args.noise, config["tables"], args.docs_per_size)
+    report = {"environment": environment_info(), "config": config, "results": results}
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            save_json(path, report)
+            print(f"Results written to {path}")
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, load_json(args.baseline), args.tolerance)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
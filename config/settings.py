@@ -7,6 +7,17 @@ class AWSConfig:
     s3_bucket: str = os.getenv("S3_DOCUMENT_BUCKET", "loan-documents-dev")
     sqs_queue_url: str = os.getenv("SQS_QUEUE_URL","")
     dynamodb_table: str = os.getenv("DYNAMODB_TABLE", "loan-extractions-dev")
+    dynamodb_status_index: str = os.getenv("DYNAMODB_STATUS_INDEX", "status-processed_at-index")
+    use_localstack: bool = os.getenv("USE_LOCALSTACK", "true").lower() == "true"
+    localstack_endpoint: str = os.getenv("LOCALSTACK_ENDPOINT", "http://localhost:4566")
+    localstack_services: str = os.getenv("LOCALSTACK_SERVICES", "dynamodb,s3,sqs")
+    max_pool_connections: int = int(os.getenv("AWS_MAX_POOL_CONNECTIONS", "0"))
+    retry_mode: str = os.getenv("AWS_RETRY_MODE", "standard")
+    max_attempts: int = int(os.getenv("AWS_MAX_ATTEMPTS", "5"))
+    connect_timeout_seconds: float = float(os.getenv("AWS_CONNECT_TIMEOUT", "5"))
+    read_timeout_seconds: float = float(os.getenv("AWS_READ_TIMEOUT", "60"))
+    tcp_keepalive: bool = os.getenv("AWS_TCP_KEEPALIVE", "true").lower() == "true"
+    table_retry_seconds: float = float(os.getenv("AWS_TABLE_RETRY_SECONDS", "30"))
 
     
 @dataclass
@@ -39,7 +50,80 @@ class ValidationConfig:
 @dataclass
 class MonitoringConfig:
     log_level : str = os.getenv("LOG_LEVEL", "INFO")     
+    log_format : str = os.getenv("LOG_FORMAT", "json")
+    log_debug_sample_rate : float = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+    log_queue_size : int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
     enable_metrics: bool = os.getenv("ENABLE_METRICS", "true").lower() == "true"
+    trace_sample_rate : float = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    trace_file : str = os.getenv("TRACE_FILE", "")
+    trace_history : int = int(os.getenv("TRACE_HISTORY", "100"))
+    profile_extraction : bool = os.getenv("PROFILE_EXTRACTION", "false").lower() == "true"
+    profile_dir : str = os.getenv("PROFILE_DIR", "profiles")
+    profile_top_n : int = int(os.getenv("PROFILE_TOP_N", "20"))
+
+
+@dataclass
+class JobsConfig:
+    max_workers : int = int(os.getenv("JOB_WORKERS", "2"))
+    max_pending : int = int(os.getenv("JOB_MAX_PENDING", "100"))
+    db_path : str = os.getenv("JOB_DB_PATH", "jobs.db")
+    event_poll_seconds : float = float(os.getenv("JOB_EVENT_POLL_SECONDS", "0.5"))
+    event_stream_max_seconds : float = float(os.getenv("JOB_EVENT_MAX_SECONDS", "600"))
+
+
+@dataclass
+class AdmissionConfig:
+    max_in_flight : int = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "4"))
+    max_queued : int = int(os.getenv("ADMISSION_MAX_QUEUED", "16"))
+    queue_timeout_seconds : float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+    interactive_reserved : int = int(os.getenv("ADMISSION_INTERACTIVE_RESERVED", "1"))
+
+
+@dataclass
+class DedupConfig:
+    enabled : bool = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    num_perm : int = int(os.getenv("DEDUP_NUM_PERM", "64"))
+    bands : int = int(os.getenv("DEDUP_BANDS", "16"))
+    shingle_size : int = int(os.getenv("DEDUP_SHINGLE_WORDS", "5"))
+    threshold : float = float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+    capacity : int = int(os.getenv("DEDUP_CAPACITY", "100000"))
+    warm_start : bool = os.getenv("DEDUP_WARM_START", "true").lower() == "true"
+
+
+@dataclass
+class SegmentationConfig:
+    enabled : bool = os.getenv("SEGMENTATION_ENABLED", "true").lower() == "true"
+    min_page_score : float = float(os.getenv("SEGMENT_MIN_PAGE_SCORE", "0.4"))
+    max_workers : int = int(os.getenv("SEGMENT_WORKERS", "4"))
+
+
+@dataclass
+class RAGConfig:
+    embedding_model : str = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    embedding_backend : str = os.getenv("EMBEDDING_BACKEND", "float32")
+    embedding_precision : str = os.getenv("EMBEDDING_PRECISION", "float32")
+    embedding_batch_size : int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+
+@dataclass
+class SimulationConfig:
+    enabled : bool = os.getenv("SIMULATE_BACKENDS", "false").lower() == "true"
+    seed : int = int(os.getenv("SIMULATION_SEED", "0"))
+    time_scale : float = float(os.getenv("SIMULATION_TIME_SCALE", "1.0"))
+    latency_sigma : float = float(os.getenv("SIMULATION_LATENCY_SIGMA", "0.4"))
+    textract_base_ms : float = float(os.getenv("TEXTRACT_SIM_BASE_MS", "1200"))
+    textract_per_page_ms : float = float(os.getenv("TEXTRACT_SIM_PER_PAGE_MS", "350"))
+    textract_tps_limit : float = float(os.getenv("TEXTRACT_SIM_TPS", "10"))
+    textract_throttle_rate : float = float(os.getenv("TEXTRACT_SIM_THROTTLE_RATE", "0.0"))
+    textract_failure_rate : float = float(os.getenv("TEXTRACT_SIM_FAILURE_RATE", "0.01"))
+    llm_base_ms : float = float(os.getenv("LLM_SIM_BASE_MS", "600"))
+    llm_per_1k_tokens_ms : float = float(os.getenv("LLM_SIM_PER_1K_TOKENS_MS", "450"))
+    llm_tps_limit : float = float(os.getenv("LLM_SIM_TPS", "5"))
+    llm_throttle_rate : float = float(os.getenv("LLM_SIM_THROTTLE_RATE", "0.0"))
+    llm_failure_rate : float = float(os.getenv("LLM_SIM_FAILURE_RATE", "0.02"))
+    max_attempts : int = int(os.getenv("SIMULATION_MAX_ATTEMPTS", "3"))
+    backoff_base_ms : float = float(os.getenv("SIMULATION_BACKOFF_BASE_MS", "100"))
+    backoff_max_ms : float = float(os.getenv("SIMULATION_BACKOFF_MAX_MS", "2000"))
 
 
 @dataclass
@@ -50,6 +134,12 @@ class Settings:
     extraction: ExtractionConfig = field(default_factory=ExtractionConfig)
     validation: ValidationConfig = field(default_factory=ValidationConfig)
     monitoring: MonitoringConfig = field(default_factory=MonitoringConfig)
+    simulation: SimulationConfig = field(default_factory=SimulationConfig)
+    jobs: JobsConfig = field(default_factory=JobsConfig)
+    admission: AdmissionConfig = field(default_factory=AdmissionConfig)
+    dedup: DedupConfig = field(default_factory=DedupConfig)
+    segmentation: SegmentationConfig = field(default_factory=SegmentationConfig)
+    rag: RAGConfig = field(default_factory=RAGConfig)
     environment: str = os.getenv("ENVIRONMENT", "development")
 settings = Settings()
 
@@ -1,4 +1,4 @@
-import boto3
+from pipeline import aws_clients
 
 # Create a text version of a loan document
 loan_text = """
@@ -21,8 +21,7 @@ with open("test_loan.txt", "w") as f:
 print("Text file created: test_loan.txt")
 
 # Upload to fake S3
-s3 = boto3.client('s3', endpoint_url='http://localhost:4566',
-    aws_access_key_id='test', aws_secret_access_key='test', region_name='us-east-1')
+s3 = aws_clients.client('s3')
 s3.upload_file("test_loan.txt", "loan-documents-dev", "test_loan.txt")
 print("Uploaded to fake S3: loan-documents-dev/test_loan.txt")
 
@@ -1,14 +1,16 @@
 import logging
+from config.settings import settings
 from pipeline.agent import ExtractionAgent
+from pipeline.logging_config import configure_logging
 
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 
-def run_pipeline(document_id):
+def run_pipeline(document_id, profile=settings.monitoring.profile_extraction):
     """Run the agentic extraction pipeline."""
     agent = ExtractionAgent()
-    state = agent.run(document_id)
+    state = agent.run(document_id, profile=profile)
     return state
 
 
@@ -19,8 +21,16 @@ if __name__ == "__main__":
     print(f"Document: {result['document_id']}")
     print(f"Status: {result['status']}")
     print(f"Valid: {result['validation']['valid']}")
-    for field, data in result['final_result'].items():
+    for field, data in result.final_fields().items():
         if isinstance(data, dict):
             print(f"  {field}: {data['value']} (confidence: {data['confidence']:.2f}, method: {data['method']})")
 
+    profile = result['monitoring'].get('profile')
+    if profile:
+        print("\n=== PROFILE (top functions by self time) ===")
+        for row in profile['cpu_top'][:10]:
+            print(f"  {row['tottime_ms']:>9.2f}ms  {row['ncalls']:>7}  {row['function']}")
+        print(f"Peak traced memory: {profile['peak_memory_kb']} KB")
+        print(f"Artifacts: {profile['artifacts']}")
+
 
@@ -0,0 +1,147 @@
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+LANES = ("interactive", "backfill")
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; carries a Retry-After hint in seconds."""
+
+    def __init__(self, message, lane, reason, retry_after):
+        super().__init__(message)
+        self.lane = lane
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds concurrent and queued extractions, with priority lanes.
+
+    At most `max_in_flight` extractions run at once. Up to `max_queued`
+    requests per lane wait for a slot; beyond that, or after waiting
+    `queue_timeout` seconds, requests are rejected straight away so the
+    client can retry elsewhere instead of everyone getting slower.
+    Waiting interactive requests always go before backfill, and backfill
+    never takes the last `interactive_reserved` slots. An exclusive request
+    (a profiled run) waits for the running ones to finish and then holds
+    every slot; nothing else is admitted while it waits or runs.
+    """
+
+    def __init__(self, max_in_flight=None, max_queued=None, queue_timeout=None, interactive_reserved=None):
+        config = settings.admission
+        self.max_in_flight = max_in_flight or config.max_in_flight
+        self.max_queued = config.max_queued if max_queued is None else max_queued
+        self.queue_timeout = config.queue_timeout_seconds if queue_timeout is None else queue_timeout
+        reserved = config.interactive_reserved if interactive_reserved is None else interactive_reserved
+        self.interactive_reserved = min(reserved, self.max_in_flight - 1)
+        self._cond = threading.Condition()
+        self._in_flight = Counter()
+        self._queued = Counter()
+        self._exclusive = False
+        self._exclusive_waiting = 0
+        self.admitted = Counter()
+        self.rejected = Counter()
+        self._avg_service_s = None
+        logger.info("Admission control: %d in flight, %d queued per lane", self.max_in_flight, self.max_queued)
+
+    def _lane_limit(self, lane):
+        if lane == "interactive":
+            return self.max_in_flight
+        return self.max_in_flight - self.interactive_reserved
+
+    def _can_run(self, lane, exclusive=False):
+        if self._exclusive:
+            return False
+        if exclusive:
+            return sum(self._in_flight.values()) == 0
+        if self._exclusive_waiting:
+            return False
+        if sum(self._in_flight.values()) >= self._lane_limit(lane):
+            return False
+        return lane == "interactive" or self._queued["interactive"] == 0
+
+    def retry_after(self):
+        """Seconds until a slot is likely free: queued work divided by drain rate."""
+        service_s = self._avg_service_s or 1.0
+        backlog = sum(self._queued.values()) + 1
+        return max(1, math.ceil(service_s * backlog / self.max_in_flight))
+
+    def _reject(self, lane, reason):
+        self.rejected[(lane, reason)] += 1
+        retry_after = self.retry_after()
+        logger.warning("Rejected %s request (%s), retry after %ss", lane, reason, retry_after)
+        return AdmissionRejected(f"Server busy ({reason}), retry after {retry_after}s", lane, reason, retry_after)
+
+    def acquire(self, lane="interactive", timeout=None, bounded=True, exclusive=False):
+        """Take an in-flight slot, waiting in the lane's queue; raise AdmissionRejected.
+
+        bounded=False waits as long as it takes and ignores the queue limit, for
+        callers such as the job runner that already bound their own backlog.
+        exclusive=True takes every slot, so the request runs alone.
+        """
+        if lane not in LANES:
+            raise ValueError(f"Unknown priority lane: {lane}")
+        if not bounded:
+            timeout = None
+        elif timeout is None:
+            timeout = self.queue_timeout
+        with self._cond:
+            if not self._can_run(lane, exclusive):
+                if bounded and self._queued[lane] >= self.max_queued:
+                    raise self._reject(lane, "queue_full")
+                self._queued[lane] += 1
+                self._exclusive_waiting += exclusive
+                try:
+                    admitted = self._cond.wait_for(lambda: self._can_run(lane, exclusive), timeout=timeout)
+                finally:
+                    self._queued[lane] -= 1
+                    self._exclusive_waiting -= exclusive
+                if not admitted:
+                    # Wake the other lane; it may be able to use the slot we were waiting on
+                    self._cond.notify_all()
+                    raise self._reject(lane, "queue_timeout")
+            self._in_flight[lane] += 1
+            self._exclusive = exclusive
+            self.admitted[lane] += 1
+
+    def release(self, lane, service_s=None):
+        with self._cond:
+            self._in_flight[lane] -= 1
+            # Nothing else runs beside an exclusive request, so this release is its own
+            self._exclusive = False
+            if service_s is not None:
+                # EWMA of service time feeds the Retry-After estimate
+                self._avg_service_s = (service_s if self._avg_service_s is None
+                                       else 0.8 * self._avg_service_s + 0.2 * service_s)
+            self._cond.notify_all()
+
+    @contextmanager
+    def admit(self, lane="interactive", timeout=None, bounded=True, exclusive=False):
+        """Hold a slot (every slot when exclusive) for the duration of the block."""
+        self.acquire(lane, timeout, bounded, exclusive)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(lane, time.perf_counter() - started)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queued": self.max_queued,
+                "in_flight": {lane: self._in_flight[lane] for lane in LANES},
+                "queued": {lane: self._queued[lane] for lane in LANES},
+                "exclusive": self._exclusive,
+                "admitted": {lane: self.admitted[lane] for lane in LANES},
+                "rejected": {f"{lane}:{reason}": count for (lane, reason), count in self.rejected.items()},
+                "avg_service_seconds": round(self._avg_service_s or 0.0, 4),
+                "retry_after_seconds": self.retry_after()
+            }
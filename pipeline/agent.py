@@ -1,8 +1,12 @@
-import time
+import contextvars
 import logging
-from py_compile import main
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pipeline.textract_client import TextractClient
 from pipeline.text_cleaner import TextCleaner
+from pipeline.table_stitcher import index_blocks
+from pipeline.forms_index import FormsIndex
 from pipeline.classifier import DocumentClassifier
 from pipeline.rule_engine import RuleEngine
 from pipeline.llm_extractor import LLMExtractor
@@ -11,10 +15,27 @@ from pipeline.validator import Validator
 from pipeline.rag_retriever import RAGRetriever
 from pipeline.guardrails import Guardrails
 from pipeline.dynamodb_store import DynamoDBStore
-from pipeline.monitoring import PipelineMonitor
+from pipeline.dedup import DuplicateIndex
+from pipeline.segmenter import PageSegmenter
+from pipeline.monitoring import PipelineMonitor, span
+from pipeline.profiler import RunProfiler, profile_thread
+from pipeline.state import FieldResult, PipelineState
+from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# Intermediates released after each step, once no later step reads them
+RELEASE_AFTER = {
+    "Segment": ("pages",),
+    "Guardrails": ("clean_text", "forms"),
+    "Store": ("signature",),
+}
+
+# Steps a reused duplicate extraction makes unnecessary
+DUPLICATE_SKIPS = ("Segment", "Extract", "Consensus")
+
+RAG_QUERY = "borrower name loan amount interest rate term payment"
+
 
 class ExtractionAgent:
     """LangGraph-style agent that orchestrates the extraction pipeline."""
@@ -30,123 +51,223 @@ class ExtractionAgent:
         self.rag = RAGRetriever()
         self.guardrails = Guardrails()
         self.db = DynamoDBStore()
+        self.dedup = DuplicateIndex() if settings.dedup.enabled else None
+        if self.dedup is not None and settings.dedup.warm_start and self.db.table is not None:
+            # Live adds wait for the warm start, so the stored entries are evicted before them
+            self.dedup.begin_load()
+            threading.Thread(target=self._warm_dedup, args=(self.dedup,), name="dedup-warm", daemon=True).start()
+        self.segmenter = PageSegmenter(self.classifier, self.rule_engine)
+        # Shared by all runs; segments of one package are extracted concurrently
+        self.segment_pool = ThreadPoolExecutor(max_workers=settings.segmentation.max_workers,
+                                               thread_name_prefix="segment")
         self.monitor = PipelineMonitor()
         logger.info("Agent initialized with all workers")
 
-    def run(self, document_id):
-        """Agent decides what steps to take."""
+    def _warm_dedup(self, index):
+        """Reload the fingerprints of recent approved results, so duplicates are found across restarts."""
+        try:
+            entries = list(self.db.iter_fingerprints(index.capacity))
+        except Exception as e:
+            logger.warning("Could not warm duplicate index from DynamoDB: %s", e)
+            entries = []
+        # Loaded even when empty: that releases the adds held aside since begin_load()
+        loaded = index.load(reversed(entries))
+        logger.info("Duplicate index warmed with %d stored results", loaded)
+
+    def run(self, document_id, profile=False, on_step=None, keep_intermediates=False):
+        """Agent decides what steps to take.
+
+        profile=True attaches a CPU/allocation profile to the trace. on_step(step, status, duration_ms)
+        is called when each step starts ("running") and finishes ("success"), or with "skipped"
+        for steps a reused duplicate extraction makes unnecessary.
+        keep_intermediates=True skips RELEASE_AFTER, for debugging.
+        """
         self.monitor.start_trace(document_id)
-        state = {"document_id": document_id, "status": "started"}
-
-        start = time.time()
-        state = self._step_ocr(state)
-        self.monitor.log_step("OCR", (time.time() - start) * 1000)
-
-        start = time.time()
-        state = self._step_clean(state)
-        self.monitor.log_step("Clean", (time.time() - start) * 1000)
-
-        start = time.time()
-        state = self._step_rag_store(state)
-        self.monitor.log_step("RAG Store", (time.time() - start) * 1000)
-
-        start = time.time()
-        state = self._step_extract(state)
-        self.monitor.log_step("Extract", (time.time() - start) * 1000)
-        self.monitor.log_llm_call("mock", input_tokens=500, output_tokens=200)
-
-        start = time.time()
-        state = self._step_consensus(state)
-        self.monitor.log_step("Consensus", (time.time() - start) * 1000)
-
-        start = time.time()
-        state = self._step_guardrails(state)
-        self.monitor.log_step("Guardrails", (time.time() - start) * 1000)
-
-        start = time.time()
-        state = self._step_validate(state)
-        self.monitor.log_step("Validate", (time.time() - start) * 1000)
-
-        start = time.time()
-        state = self._step_decide(state)
-        self.monitor.log_step("Decide", (time.time() - start) * 1000)
-
-        state = self._step_store(state)
-
+        state = PipelineState(document_id)
+
+        steps = [
+            ("OCR", self._step_ocr),
+            ("Clean", self._step_clean),
+            ("Dedup", self._step_dedup),
+            ("Segment", self._step_segment),
+            ("Extract", self._step_extract),
+            ("Consensus", self._step_consensus),
+            ("Guardrails", self._step_guardrails),
+            ("Validate", self._step_validate),
+            ("Decide", self._step_decide),
+            ("Store", self._step_store),
+        ]
+
+        profiler = RunProfiler(document_id) if profile else nullcontext()
+        try:
+            with profiler:
+                for step_name, step in steps:
+                    if state.duplicate_of is not None and step_name in DUPLICATE_SKIPS:
+                        if not keep_intermediates:
+                            state.release(*RELEASE_AFTER.get(step_name, ()))
+                        if on_step is not None:
+                            on_step(step_name, "skipped")
+                        continue
+                    if on_step is not None:
+                        on_step(step_name, "running")
+                    with self.monitor.span(step_name) as step_span:
+                        state = step(state)
+                    if not keep_intermediates:
+                        state.release(*RELEASE_AFTER.get(step_name, ()))
+                    if on_step is not None:
+                        on_step(step_name, "success", round(step_span.wall_ms, 2))
+        except Exception:
+            self.monitor.end_trace(status="error")
+            raise
+        finally:
+            self.rag.clear()
+
+        if profile:
+            self.monitor.current_trace["profile"] = profiler.summary
         state["monitoring"] = self.monitor.end_trace()
         return state
 
-        # Step 1: OCR
-        state = self._step_ocr(state)
-
-        # Step 2: Clean
-        state = self._step_clean(state)
-
-        # Step 3: Extract with both methods
-        state = self._step_extract(state)
-
-        # Step 4: Consensus
-        state = self._step_consensus(state)
-
-        # Step 5: Validate
-        state = self._step_validate(state)
-
-        # Step 6: Agent decides - is result good enough?
-        state = self._step_decide(state)
-
-        return state
-
     def _step_ocr(self, state):
         """Agent step: Read document."""
-        logger.info("Agent → Step 1: OCR")
+        logger.debug("Agent → Step 1: OCR")
         response = self.textract.process_document(state["document_id"])
-        text_lines = [block['Text'] for block in response['Blocks'] if block.get('Text')]
-        state["raw_text"] = ' '.join(text_lines)
+        # Large documents come back as one response per page chunk
+        responses = response if isinstance(response, list) else [response]
+
+        forms = FormsIndex()
+        page_lines = {}
+        for chunk in responses:
+            blocks = chunk['Blocks']
+            index = index_blocks(blocks)
+            for block in blocks:
+                if block['BlockType'] == 'LINE' and block.get('Text'):
+                    page_lines.setdefault(block.get('Page', 1), []).append(block['Text'])
+            forms.add_blocks(blocks, index, clean=self.cleaner.clean_value)
+        state.pages = [(page, ' '.join(lines)) for page, lines in sorted(page_lines.items())] or [(1, '')]
+        state["forms"] = forms
+        logger.info("OCR found %d form fields", len(forms))
         state["status"] = "ocr_complete"
         return state
 
     def _step_clean(self, state):
         """Agent step: Clean text."""
-        logger.info("Agent → Step 2: Cleaning text")
-        state["clean_text"] = self.cleaner.clean(state["raw_text"])
+        logger.debug("Agent → Step 2: Cleaning text")
+        # Cleaned page by page; segmentation needs page boundaries
+        state.pages = [(page, self.cleaner.clean_value(text)) for page, text in state.pages]
+        state["clean_text"] = ' '.join(text for _, text in state.pages if text)
+        logger.info("Cleaned %d pages: %d chars", len(state.pages), len(state.clean_text))
         state["status"] = "cleaned"
         return state
 
-    def _step_rag_store(self, state):
-        """Agent step: Store document chunks in vector DB."""
-        logger.info("Agent → Step 3: Storing in vector DB (RAG)")
-        chunks = self.rag.store_document(state["document_id"], state["clean_text"])
-        state["chunks"] = chunks
-        state["status"] = "stored_in_vectordb"
+    def _step_dedup(self, state):
+        """Agent step: Reuse the extraction of an exact or near-duplicate document."""
+        if self.dedup is None:
+            return state
+        with span("Dedup Lookup"):
+            state.content_hash, state.signature = self.dedup.fingerprint(state.clean_text)
+            match = self.dedup.lookup(state.content_hash, state.signature)
+        if match is None:
+            return state
+
+        cached = {name: FieldResult(**data) if isinstance(data, dict) else data
+                  for name, data in match.fields.items()}
+        if not match.exact and not self._verify_duplicate(state, cached):
+            logger.info("Near-duplicate of %s (%s) failed verification, running full extraction",
+                        match.document_id, match.similarity)
+            return state
+
+        logger.info("Reusing extraction of %s (%s)", match.document_id,
+                    "exact" if match.exact else f"similarity {match.similarity}")
+        state.final_result = cached
+        state.duplicate_of = match.document_id
+        state.status = "duplicate"
         return state
-    
+
+    def _verify_duplicate(self, state, cached):
+        """Cheap check that a near-duplicate's fields still hold: rules must agree and guardrails pass."""
+        with span("Dedup Verify"):
+            rule_result = self.rule_engine.extract(state.clean_text, cached.get("loan_type"), forms=state.forms)
+            for name, result in cached.items():
+                found = rule_result.get(name)
+                if (isinstance(result, FieldResult) and result.value is not None and found
+                        and found["value"] is not None and _normalize(found["value"]) != _normalize(result.value)):
+                    return False
+            return self.guardrails.check(cached, state.clean_text, forms=state.forms)["passed"]
+
+    def _step_segment(self, state):
+        """Agent step: Split a loan package into sub-documents and pick the ones worth extracting."""
+        logger.debug("Agent → Step 3: Segmenting pages")
+        segments = self.segmenter.segment(state.pages) if settings.segmentation.enabled else []
+        if not any(segment.relevant for segment in segments):
+            # Nothing looked like loan terms; fall back to extracting the whole document
+            segments = [PageSegmenter.whole_document(state.pages)]
+        for segment in segments:
+            if not segment.relevant:
+                segment.texts = None
+        state.segments = segments
+        state["status"] = "segmented"
+        return state
+
     def _step_extract(self, state):
-        """Agent step: Run both extraction methods with RAG context."""
-        logger.info("Agent → Step 4: Extracting (rules + LLM with RAG)")
-        text = state["clean_text"]
-
-        # RAG: Find relevant chunks for extraction
-        relevant_chunks = self.rag.retrieve("borrower name loan amount interest rate term payment")
-        rag_context = ' '.join(relevant_chunks)
-        logger.info(f"RAG provided {len(relevant_chunks)} relevant chunks")
-
-        classification = self.classifier.classify(text)
-        state["rule_result"] = self.rule_engine.extract(text, classification["loan_type"])
-        state["llm_result"] = self.llm_extractor.extract(rag_context)
+        """Agent step: Run both extraction methods with RAG context, per relevant segment in parallel."""
+        logger.debug("Agent → Step 4: Extracting (rules + LLM with RAG)")
+        relevant = [segment for segment in state.segments if segment.relevant]
+        if len(relevant) == 1:
+            self._extract_segment(state, relevant[0])
+        else:
+            # Each task gets a copy of this context so its spans land under this step
+            futures = [self.segment_pool.submit(contextvars.copy_context().run, self._extract_segment, state, segment)
+                       for segment in relevant]
+            for future in futures:
+                future.result()
         state["status"] = "extracted"
         return state
 
+    def _extract_segment(self, state, segment):
+        """RAG, classification, rules and LLM for one segment; the RAG store is per thread."""
+        with profile_thread(), span("Extract Segment", pages=f"{segment.first_page}-{segment.last_page}"):
+            text = segment.text
+            forms = state.forms.for_pages(segment.first_page, segment.last_page) if state.forms else None
+            try:
+                with span("RAG Store"):
+                    self.rag.store_document(state.document_id, text)
+                # RAG: Find relevant chunks for extraction
+                relevant_chunks = self.rag.retrieve(RAG_QUERY)
+            finally:
+                self.rag.clear()
+            rag_context = ' '.join(relevant_chunks)
+            logger.debug("RAG provided %d relevant chunks for pages %d-%d",
+                         len(relevant_chunks), segment.first_page, segment.last_page)
+
+            with span("Classify"):
+                classification = self.classifier.classify(text)
+            segment.loan_type = classification["loan_type"]
+            with span("Rules"):
+                segment.rule_result = self.rule_engine.extract(text, segment.loan_type, forms=forms)
+            with span("LLM"):
+                segment.llm_result = self.llm_extractor.extract(rag_context)
+            self.monitor.log_llm_call("mock", input_tokens=500, output_tokens=200)
+            segment.texts = None
+
     def _step_consensus(self, state):
-        """Agent step: Compare results."""
-        logger.info("Agent → Step 4: Consensus check")
-        state["final_result"] = self.consensus.check(state["rule_result"], state["llm_result"])
+        """Agent step: Compare results per segment; the segment that states the most fields is the result."""
+        logger.debug("Agent → Step 4: Consensus check")
+        relevant = [segment for segment in state.segments if segment.relevant]
+        for segment in relevant:
+            segment.fields = self.consensus.check(segment.rule_result, segment.llm_result)
+            segment.rule_result = segment.llm_result = None
+        primary = max(relevant, key=lambda segment: segment.found_fields())
+        state["final_result"] = primary.fields
+        if len(relevant) > 1:
+            logger.info("Using pages %d-%d of %d relevant segments", primary.first_page, primary.last_page, len(relevant))
         state["status"] = "consensus_complete"
         return state
     
     def _step_guardrails(self, state):
         """Agent step: Check for hallucinations."""
-        logger.info("Agent → Step 5: Guardrails check")
-        state["guardrails"] = self.guardrails.check(state["final_result"], state["clean_text"])
+        logger.debug("Agent → Step 5: Guardrails check")
+        state["guardrails"] = self.guardrails.check(state["final_result"], state["clean_text"],
+                                                    forms=state.get("forms"))
         if not state["guardrails"]["passed"]:
             logger.warning("Guardrails failed — possible hallucinations detected")
         state["status"] = "guardrails_checked"
@@ -154,14 +275,14 @@ class ExtractionAgent:
 
     def _step_validate(self, state):
         """Agent step: Validate results."""
-        logger.info("Agent → Step 5: Validating")
+        logger.debug("Agent → Step 5: Validating")
         state["validation"] = self.validator.validate(state["final_result"])
         state["status"] = "validated"
         return state
 
     def _step_decide(self, state):
         """Agent step: Decide if results are good enough."""
-        logger.info("Agent → Step 6: Decision")
+        logger.debug("Agent → Step 6: Decision")
 
         if not state["validation"]["valid"]:
             state["status"] = "needs_review"
@@ -169,13 +290,20 @@ class ExtractionAgent:
             return state
 
         low_confidence = []
+        unchecked = []
         for field, data in state["final_result"].items():
-            if isinstance(data, dict) and data.get("confidence", 0) < 0.80:
+            if isinstance(data, FieldResult) and data.confidence < 0.80:
                 low_confidence.append(field)
+            elif isinstance(data, FieldResult) and data.method == "rule_only":
+                unchecked.append(field)
 
-        if low_confidence:
+        if unchecked:
+            # Every LLM provider failed, so nothing cross-checked the rule-based values
             state["status"] = "needs_review"
-            logger.warning(f"Agent decision: Low confidence on {low_confidence}, send to human review")
+            logger.warning("Agent decision: No LLM cross-check for %s, send to human review", unchecked)
+        elif low_confidence:
+            state["status"] = "needs_review"
+            logger.warning("Agent decision: Low confidence on %s, send to human review", low_confidence)
         else:
             state["status"] = "approved"
             logger.info("Agent decision: All fields approved ✅")
@@ -184,7 +312,15 @@ class ExtractionAgent:
 
     def _step_store(self, state):
         """Agent step: Store results in DynamoDB."""
-        logger.info("Agent → Step 8: Storing in DynamoDB")
+        logger.debug("Agent → Step 8: Storing in DynamoDB")
         self.db.store_result(state)
+        if (self.dedup is not None and state.content_hash is not None and state.status == "approved"
+                and state.guardrails["passed"]):
+            self.dedup.add(state.document_id, state.content_hash, state.signature, state.final_fields())
         state["status"] = "stored"
-        return state
\ No newline at end of file
+        return state
+
+
+def _normalize(value):
+    """'$25,000' and '25000' compare equal."""
+    return str(value).lower().replace(",", "").replace("$", "").strip()
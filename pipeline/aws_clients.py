@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+import boto3
+from botocore.config import Config
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.RLock()
+_session = None
+_clients = {}
+_resources = {}
+_tables = {}
+# Per-table locks, so checking one table never holds up client creation or other tables
+_table_locks = {}
+# Table name -> monotonic time its last check failed
+_table_failures = {}
+
+
+def pool_size():
+    """HTTP connections per client: AWS_MAX_POOL_CONNECTIONS, or one per thread that can call AWS at once.
+
+    Every admitted extraction can fan out to SEGMENT_WORKERS threads, so the
+    default covers ADMISSION_MAX_IN_FLIGHT x SEGMENT_WORKERS (never below
+    botocore's default of 10). Threads beyond the pool size wait for a free
+    connection instead of opening one.
+    """
+    if settings.aws.max_pool_connections > 0:
+        return settings.aws.max_pool_connections
+    return max(10, settings.admission.max_in_flight * settings.segmentation.max_workers)
+
+
+def client_config():
+    """botocore Config shared by every client: pool size, retries, timeouts and TCP keep-alive."""
+    config = settings.aws
+    return Config(
+        region_name=config.region,
+        max_pool_connections=pool_size(),
+        retries={"mode": config.retry_mode, "total_max_attempts": config.max_attempts},
+        connect_timeout=config.connect_timeout_seconds,
+        read_timeout=config.read_timeout_seconds,
+        tcp_keepalive=config.tcp_keepalive
+    )
+
+
+def uses_localstack(service):
+    config = settings.aws
+    return config.use_localstack and service in config.localstack_services.split(",")
+
+
+def _endpoint_kwargs(service):
+    """Endpoint and dummy credentials for services served by LocalStack; nothing for real AWS."""
+    if not uses_localstack(service):
+        return {}
+    return {
+        "endpoint_url": settings.aws.localstack_endpoint,
+        "aws_access_key_id": "test",
+        "aws_secret_access_key": "test"
+    }
+
+
+def session():
+    """The process-wide boto3 session; credentials are resolved once."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = boto3.session.Session(region_name=settings.aws.region)
+        return _session
+
+
+def client(service):
+    """Shared low-level client for a service. boto3 clients are thread-safe."""
+    with _lock:
+        if service not in _clients:
+            _clients[service] = session().client(service, config=client_config(), **_endpoint_kwargs(service))
+            logger.info("Created %s client (%s, pool %d)", service,
+                        "LocalStack" if uses_localstack(service) else "AWS", pool_size())
+        return _clients[service]
+
+
+def resource(service):
+    """Shared resource for a service.
+
+    Actions such as put_item and query only go through the underlying client,
+    so they can be called from any thread; loaded attributes are not refreshed.
+    """
+    with _lock:
+        if service not in _resources:
+            _resources[service] = session().resource(service, config=client_config(), **_endpoint_kwargs(service))
+        return _resources[service]
+
+
+def table(name, ensure):
+    """DynamoDB Table `name`, checked once per process.
+
+    `ensure(table)` loads or creates the table and returns it, or None when it
+    is unavailable. It runs under a lock for that table only, because it makes
+    network calls with retries. An unavailable table is remembered for
+    AWS_TABLE_RETRY_SECONDS. Until then callers get None straight away instead
+    of repeating the check.
+    """
+    with _lock:
+        if name in _tables:
+            return _tables[name]
+        table_lock = _table_locks.setdefault(name, threading.Lock())
+    with table_lock:
+        with _lock:
+            if name in _tables:
+                return _tables[name]
+            failed_at = _table_failures.get(name)
+        if failed_at is not None and time.monotonic() - failed_at < settings.aws.table_retry_seconds:
+            return None
+        verified = ensure(resource("dynamodb").Table(name))
+        with _lock:
+            if verified is None:
+                _table_failures[name] = time.monotonic()
+                return None
+            _table_failures.pop(name, None)
+            _tables[name] = verified
+            return verified
+
+
+def reset():
+    """Forget the session, clients and verified tables (after changing settings, or in a forked worker)."""
+    global _session
+    with _lock:
+        _session = None
+        _clients.clear()
+        _resources.clear()
+        _tables.clear()
+        _table_locks.clear()
+        _table_failures.clear()
@@ -17,8 +17,8 @@ class DocumentClassifier:
             "sba_loan": ["sba", "guarantee", "7(a)", "small business", "proceeds"]
         }
 
-    def classify(self, text):
-        """Classify document text into a loan type."""
+    def score(self, text):
+        """Best loan type and its keyword score, without logging (used per page)."""
         text_lower = text.lower()
         scores = {}
 
@@ -30,12 +30,16 @@ class DocumentClassifier:
             scores[loan_type] = score / len(keywords)
 
         best_type = max(scores, key=scores.get)
-        confidence = scores[best_type]
+        return best_type, scores[best_type]
+
+    def classify(self, text):
+        """Classify document text into a loan type."""
+        best_type, confidence = self.score(text)
 
-        logger.info(f"Classification: {best_type} (confidence: {confidence:.2f})")
+        logger.debug("Classification: %s (confidence: %.2f)", best_type, confidence)
 
         if confidence >= self.settings.classifier.confidence_threshold:
             return {"loan_type": best_type, "confidence": confidence, "method": "keyword"}
         else:
-            logger.warning(f"Low confidence {confidence:.2f}, below threshold")
+            logger.warning("Low confidence %.2f, below threshold", confidence)
             return {"loan_type": best_type, "confidence": confidence, "method": "low_confidence"}
\ No newline at end of file
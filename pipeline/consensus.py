@@ -1,4 +1,5 @@
 import logging
+from pipeline.state import FieldResult
 
 logger = logging.getLogger(__name__)
 
@@ -7,8 +8,17 @@ class ConsensusChecker:
     """Compares rule-based and LLM extractions for higher accuracy."""
 
     def check(self, rule_result, llm_result):
-        """Compare P1 and P2 results, pick the best."""
+        """Compare P1 and P2 results, pick the best.
+
+        `llm_result` is None when every LLM provider failed; the rule results
+        are then used as they are, marked `rule_only`, and the agent sends
+        them to human review.
+        """
         final = {}
+        llm_failed = llm_result is None
+        if llm_failed:
+            logger.warning("No LLM result, using rule-based extraction only")
+            llm_result = {}
 
         fields = ["borrower_name", "loan_amount", "interest_rate", "loan_term", "monthly_payment"]
 
@@ -21,16 +31,18 @@ class ConsensusChecker:
             rule_conf = rule_data.get("confidence", 0) if isinstance(rule_data, dict) else 0
             llm_conf = llm_data.get("confidence", 0) if isinstance(llm_data, dict) else 0
 
-            if rule_value == llm_value:
-                final[field] = {"value": llm_value, "confidence": max(rule_conf, llm_conf), "method": "consensus"}
-                logger.info(f"{field}: Both agree → {llm_value} (high confidence)")
+            if llm_failed:
+                final[field] = FieldResult(rule_value, rule_conf, "rule_only")
+            elif rule_value == llm_value:
+                final[field] = FieldResult(llm_value, max(rule_conf, llm_conf), "consensus")
+                logger.debug("%s: Both agree → %s (high confidence)", field, llm_value)
             elif llm_conf > rule_conf:
-                final[field] = {"value": llm_value, "confidence": llm_conf, "method": "llm_preferred"}
-                logger.info(f"{field}: LLM preferred → {llm_value} ({llm_conf:.2f} vs {rule_conf:.2f})")
+                final[field] = FieldResult(llm_value, llm_conf, "llm_preferred")
+                logger.debug("%s: LLM preferred → %s (%.2f vs %.2f)", field, llm_value, llm_conf, rule_conf)
             else:
-                final[field] = {"value": rule_value, "confidence": rule_conf, "method": "rule_preferred"}
-                logger.info(f"{field}: Rule preferred → {rule_value} ({rule_conf:.2f} vs {llm_conf:.2f})")
+                final[field] = FieldResult(rule_value, rule_conf, "rule_preferred")
+                logger.debug("%s: Rule preferred → %s (%.2f vs %.2f)", field, rule_value, rule_conf, llm_conf)
 
         final["loan_type"] = llm_result.get("loan_type", rule_result.get("loan_type"))
-        logger.info(f"Consensus complete: {len(final)} fields resolved")
+        logger.info("Consensus complete: %d fields resolved", len(final))
         return final
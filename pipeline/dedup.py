@@ -0,0 +1,300 @@
+import hashlib
+import json
+import logging
+import threading
+import zlib
+import numpy as np
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_PRIME = np.uint64((1 << 32) + 15)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_BATCH = 4096
+# Odd 32-bit constants mixing word positions into a k-gram hash
+_GRAM_MULTIPLIERS = np.array([0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F, 0x165667B1,
+                              0xD3A2646D, 0xFD7046C5, 0xB55A4F09], dtype=np.uint64)
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, using numpy universal hashing (a*x + b mod p)."""
+
+    def __init__(self, num_perm=None, shingle_size=None, seed=1):
+        self.num_perm = num_perm or settings.dedup.num_perm
+        self.shingle_size = shingle_size or settings.dedup.shingle_size
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, int(_PRIME), self.num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_PRIME), self.num_perm, dtype=np.uint64)
+
+    def shingles(self, text):
+        """Unique 32-bit hashes of the lower-cased word k-grams of a text.
+
+        Each word is crc32-hashed once and k-grams are combined with numpy, so
+        no k-gram strings are built.
+        """
+        words = text.lower().split()
+        word_hashes = np.fromiter(map(zlib.crc32, map(str.encode, words)), dtype=np.uint64, count=len(words))
+        k = min(self.shingle_size, len(words))
+        if k == 0:
+            return word_hashes
+        count = len(words) - k + 1
+        grams = np.zeros(count, dtype=np.uint64)
+        for position in range(k):
+            grams += word_hashes[position:position + count] * _GRAM_MULTIPLIERS[position % len(_GRAM_MULTIPLIERS)]
+        return np.unique(grams >> np.uint64(32))
+
+    def signature(self, text):
+        """uint32 signature; the fraction of equal positions estimates Jaccard similarity."""
+        hashes = self.shingles(text)
+        signature = np.full(self.num_perm, _MAX_HASH, dtype=np.uint64)
+        # Batched so a 1000-page document never materializes shingles x permutations at once
+        for start in range(0, len(hashes), _BATCH):
+            block = hashes[start:start + _BATCH, None]
+            np.minimum(signature, ((block * self.a + self.b) % _PRIME).min(axis=0), out=signature)
+        return (signature & _MAX_HASH).astype(np.uint32)
+
+
+class DuplicateMatch:
+    """A previously extracted document that matches an incoming one."""
+
+    __slots__ = ("document_id", "similarity", "exact", "fields")
+
+    def __init__(self, document_id, similarity, exact, fields):
+        self.document_id = document_id
+        self.similarity = similarity
+        self.exact = exact
+        self.fields = fields
+
+
+class DuplicateIndex:
+    """Exact (sha256) and near-duplicate (MinHash + LSH) lookup over recently extracted documents.
+
+    Signatures live in a fixed-capacity ring of numpy rows; the oldest entry
+    is overwritten once `capacity` is reached. Each signature is cut into
+    `bands` bands and every band is hashed to a uint64 key. Per band, keys
+    are kept in a sorted array (binary search) plus a small dict of recent
+    inserts that is merged into the array in bulk, so a lookup is one
+    searchsorted per band and stays well under a millisecond at millions
+    of entries. The bulk merge sorts on a background thread and only the
+    swap takes the lock, so neither add() nor lookup() waits for it.
+    Candidates are confirmed by estimated Jaccard similarity, which also
+    weeds out buckets that point at overwritten slots.
+
+    The index is per process. load() refills it, e.g. from the fingerprints
+    stored with each DynamoDB result after a restart. Entries added while a
+    load runs are held aside (and still looked up) and go into the ring after
+    the loaded ones, so the ring keeps evicting the oldest entries first.
+    """
+
+    def __init__(self, num_perm=None, bands=None, threshold=None, capacity=None, shingle_size=None):
+        config = settings.dedup
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.num_perm = self.hasher.num_perm
+        self.bands = bands or config.bands
+        if self.num_perm % self.bands:
+            raise ValueError(f"num_perm ({self.num_perm}) must be a multiple of bands ({self.bands})")
+        self.rows = self.num_perm // self.bands
+        self.threshold = config.threshold if threshold is None else threshold
+        self.capacity = capacity or config.capacity
+        self._band_multipliers = np.random.default_rng(7).integers(
+            1, 1 << 62, self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self._lock = threading.Lock()
+        self._size = 0
+        self._next = 0
+        self._signatures = np.zeros((0, self.num_perm), dtype=np.uint32)
+        self._band_keys = np.zeros((0, self.bands), dtype=np.uint64)
+        self._entries = []
+        self._exact = {}
+        self._sorted_keys = [np.empty(0, dtype=np.uint64) for _ in range(self.bands)]
+        self._sorted_slots = [np.empty(0, dtype=np.int64) for _ in range(self.bands)]
+        self._pending = [{} for _ in range(self.bands)]
+        # Pending inserts handed to a running background merge; still searched until it lands
+        self._merging = None
+        self._pending_count = 0
+        # content_hash -> entry for adds made while a load runs; None when no load is running
+        self._deferred = None
+        logger.info("Duplicate index: %d permutations, %d bands, threshold %s, capacity %d",
+                    self.num_perm, self.bands, self.threshold, self.capacity)
+
+    def __len__(self):
+        return self._size
+
+    def fingerprint(self, text):
+        """(sha256 hex, MinHash signature) for a cleaned document text."""
+        return hashlib.sha256(text.encode()).hexdigest(), self.hasher.signature(text)
+
+    def _keys(self, signature):
+        bands = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        return (bands * self._band_multipliers).sum(axis=1)
+
+    def _grow(self):
+        allocated = min(self.capacity, max(1024, 2 * len(self._signatures)))
+        self._signatures = np.resize(self._signatures, (allocated, self.num_perm))
+        self._band_keys = np.resize(self._band_keys, (allocated, self.bands))
+
+    def _begin_merge(self):
+        """Hand the pending inserts to a merge (under the lock); returns the merge's arguments."""
+        self._merging = self._pending
+        self._pending = [{} for _ in range(self.bands)]
+        self._pending_count = 0
+        return self._band_keys, self._size
+
+    def _merge(self, band_keys, size):
+        """Sort every band's keys for the first `size` slots without the lock, then swap them in.
+
+        Slots overwritten meanwhile may leave stale keys behind; lookups
+        confirm candidates by similarity, so that only costs a comparison.
+        """
+        slots = np.arange(size)
+        sorted_keys, sorted_slots = [], []
+        for band in range(self.bands):
+            keys = band_keys[:size, band].copy()
+            order = np.argsort(keys, kind="stable")
+            sorted_keys.append(keys[order])
+            sorted_slots.append(slots[order])
+        with self._lock:
+            merged = self._merging
+            self._sorted_keys, self._sorted_slots = sorted_keys, sorted_slots
+            self._merging = None
+        # Freed entry by entry, off the lock: dropping millions of entries in one go holds the GIL
+        for pending in merged:
+            while pending:
+                pending.popitem()
+
+    def _insert(self, document_id, content_hash, signature, fields_json):
+        """Add one entry to the ring and the pending dicts; the caller holds the lock."""
+        if content_hash in self._exact:
+            return False
+        slot = self._next
+        if slot >= len(self._signatures):
+            self._grow()
+        if slot < self._size:
+            evicted = self._entries[slot]
+            if self._exact.get(evicted[1]) == slot:
+                del self._exact[evicted[1]]
+            self._entries[slot] = (document_id, content_hash, fields_json)
+        else:
+            self._entries.append((document_id, content_hash, fields_json))
+            self._size += 1
+        keys = self._keys(signature)
+        self._signatures[slot] = signature
+        self._band_keys[slot] = keys
+        self._exact[content_hash] = slot
+        for band, key in enumerate(keys.tolist()):
+            # A bare slot per key; a list only on a collision. Ints are not tracked by the
+            # cyclic GC, millions of one-item lists would make every full collection slow
+            bucket = self._pending[band]
+            existing = bucket.get(key)
+            if existing is None:
+                bucket[key] = slot
+            elif isinstance(existing, list):
+                existing.append(slot)
+            else:
+                bucket[key] = [existing, slot]
+        self._pending_count += 1
+        self._next = (slot + 1) % self.capacity
+        return True
+
+    def add(self, document_id, content_hash, signature, fields):
+        """Remember a finished extraction; the oldest entry is evicted when full."""
+        fields_json = json.dumps(fields)
+        merge = None
+        with self._lock:
+            if self._deferred is not None:
+                if content_hash not in self._exact:
+                    self._deferred.setdefault(content_hash, (document_id, content_hash, signature, fields_json))
+                return
+            self._insert(document_id, content_hash, signature, fields_json)
+            if self._merging is None and self._pending_count >= max(1024, self._size // 8):
+                merge = self._begin_merge()
+        if merge is not None:
+            threading.Thread(target=self._merge, args=merge, name="dedup-merge", daemon=True).start()
+
+    def begin_load(self):
+        """Hold live adds aside until the next load() finishes, so loaded entries stay older than them.
+
+        Call it before the index takes live adds when the entries to load are
+        still being fetched; load() calls it itself otherwise.
+        """
+        with self._lock:
+            if self._deferred is None:
+                self._deferred = {}
+
+    def load(self, entries):
+        """Add (document_id, content_hash, signature, fields) entries in bulk, oldest first; returns how many.
+
+        `signature` may be the raw bytes stored in DynamoDB; ones made with a
+        different DEDUP_NUM_PERM are skipped. Meant for an index that holds no
+        live entries yet (see begin_load()); adds made meanwhile are inserted
+        after the loaded entries, even if reading `entries` fails. Merges once,
+        on this thread.
+        """
+        self.begin_load()
+        loaded = 0
+        try:
+            entries = list(entries)
+            # The lock is taken per batch so lookups keep running during a large load
+            for start in range(0, len(entries), _BATCH):
+                with self._lock:
+                    for document_id, content_hash, signature, fields in entries[start:start + _BATCH]:
+                        if isinstance(signature, (bytes, bytearray)):
+                            signature = np.frombuffer(signature, dtype=np.uint32)
+                        if len(signature) != self.num_perm:
+                            continue
+                        loaded += self._insert(document_id, content_hash, signature, json.dumps(fields))
+        finally:
+            merge = None
+            with self._lock:
+                deferred, self._deferred = self._deferred, None
+                for entry in deferred.values():
+                    self._insert(*entry)
+                if self._merging is None:
+                    merge = self._begin_merge()
+            if merge is not None:
+                self._merge(*merge)
+        return loaded
+
+    def lookup(self, content_hash, signature):
+        """Best DuplicateMatch at or above the similarity threshold, or None."""
+        with self._lock:
+            slot = self._exact.get(content_hash)
+            if slot is not None:
+                document_id, _, fields = self._entries[slot]
+                return DuplicateMatch(document_id, 1.0, True, json.loads(fields))
+            deferred = list(self._deferred.values()) if self._deferred else []
+            for document_id, deferred_hash, _, fields in deferred:
+                if deferred_hash == content_hash:
+                    return DuplicateMatch(document_id, 1.0, True, json.loads(fields))
+
+            candidates = set()
+            for band, key in enumerate(self._keys(signature)):
+                sorted_keys = self._sorted_keys[band]
+                start = np.searchsorted(sorted_keys, key, side="left")
+                end = np.searchsorted(sorted_keys, key, side="right")
+                if end > start:
+                    candidates.update(self._sorted_slots[band][start:end].tolist())
+                for pending in (self._pending, self._merging):
+                    hit = pending[band].get(int(key)) if pending is not None else None
+                    if isinstance(hit, list):
+                        candidates.update(hit)
+                    elif hit is not None:
+                        candidates.add(hit)
+            matches = []
+            if candidates:
+                slots = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+                similarity = (self._signatures[slots] == signature).mean(axis=1)
+                best = int(np.argmax(similarity))
+                document_id, _, fields = self._entries[slots[best]]
+                matches.append((float(similarity[best]), document_id, fields))
+            if deferred:
+                # Few entries (adds during a load), compared directly
+                similarity = (np.stack([entry[2] for entry in deferred]) == signature).mean(axis=1)
+                best = int(np.argmax(similarity))
+                matches.append((float(similarity[best]), deferred[best][0], deferred[best][3]))
+            if not matches:
+                return None
+            similarity, document_id, fields = max(matches, key=lambda match: match[0])
+            if similarity < self.threshold:
+                return None
+            return DuplicateMatch(document_id, round(similarity, 4), False, json.loads(fields))
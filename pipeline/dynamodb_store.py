@@ -1,44 +1,98 @@
+import base64
 import logging
 import json
-import os
-import boto3
+import math
+import zlib
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import Binary
 from datetime import datetime
+from decimal import Decimal
 from config.settings import settings
+from pipeline import aws_clients
+from pipeline.state import FieldResult
+from pipeline.validator import parse_number
 
 logger = logging.getLogger(__name__)
 
+# Copied to top-level typed attributes so dashboards can project them without the payload
+HOT_NUMBER_FIELDS = ("loan_amount", "interest_rate", "loan_term", "monthly_payment")
+HOT_TEXT_FIELDS = ("borrower_name",)
+SUMMARY_ATTRIBUTES = ("document_id", "processed_at", "status", "loan_type", "valid", "guardrails_passed",
+                      "min_confidence", *HOT_NUMBER_FIELDS, *HOT_TEXT_FIELDS)
+# Logical names of the compressed payloads, and the legacy plain attribute each replaced
+COMPRESSED_ATTRIBUTES = {"fields": "fields_z", "segments": "segments_z"}
+
+
+def compress_json(value):
+    """zlib-compressed compact JSON, stored as a DynamoDB binary attribute."""
+    return zlib.compress(json.dumps(value, separators=(",", ":"), default=FieldResult.to_dict).encode())
+
+
+def decompress_json(data):
+    """Inverse of compress_json; also accepts the base64 text found in DynamoDB JSON exports."""
+    if isinstance(data, Binary):
+        data = data.value
+    elif isinstance(data, str):
+        data = base64.b64decode(data)
+    return json.loads(zlib.decompress(data))
+
+
+def _plain_value(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, Binary):
+        return value.value
+    return value
+
+
+def decode_item(item):
+    """Stored item as plain Python: numbers as int/float, payloads as `fields`/`segments`.
+
+    Items written before the compressed layout keep `fields` as a JSON string
+    and are decoded the same way.
+    """
+    decoded = {key: _plain_value(value) for key, value in item.items()
+               if key not in COMPRESSED_ATTRIBUTES.values()}
+    for name, attribute in COMPRESSED_ATTRIBUTES.items():
+        if attribute in item:
+            decoded[name] = decompress_json(item[attribute])
+        elif isinstance(decoded.get(name), str):
+            decoded[name] = json.loads(decoded[name])
+    return decoded
+
 
 class DynamoDBStore:
     """Stores extraction results in DynamoDB."""
 
     def __init__(self):
-        localstack_endpoint = os.environ.get('LOCALSTACK_ENDPOINT', 'http://localhost:4566')
-        use_localstack = os.environ.get('USE_LOCALSTACK', 'true').lower() == 'true'
-
-        if use_localstack:
-            self.dynamodb = boto3.resource(
-                'dynamodb',
-                endpoint_url=localstack_endpoint,
-                region_name=settings.aws.region,
-                aws_access_key_id='test',
-                aws_secret_access_key='test'
-            )
-        else:
-            self.dynamodb = boto3.resource('dynamodb', region_name=settings.aws.region)
-
+        self.dynamodb = aws_clients.resource('dynamodb')
         self.table_name = settings.aws.dynamodb_table
-        self._ensure_table()
+        self.status_index = settings.aws.dynamodb_status_index
+        # Checked (and created) once per process, not once per agent
+        self._table = aws_clients.table(self.table_name, self._ensure_table)
         logger.info("DynamoDB store initialized")
 
-    def _ensure_table(self):
-        """Create table if it doesn't exist."""
+    @property
+    def table(self):
+        """The DynamoDB Table, or None while it is unavailable.
+
+        An unavailable table is checked again once AWS_TABLE_RETRY_SECONDS have
+        passed, so a long-lived store recovers without a restart.
+        """
+        if self._table is None:
+            self._table = aws_clients.table(self.table_name, self._ensure_table)
+        return self._table
+
+    def _ensure_table(self, table):
+        """Create table if it doesn't exist; the usable table, or None."""
         try:
-            self.table = self.dynamodb.Table(self.table_name)
-            self.table.load()
-            logger.info(f"Table '{self.table_name}' exists")
+            table.load()
+            logger.info("Table '%s' exists", self.table_name)
+            self._ensure_status_index(table)
+            return table
         except Exception:
             try:
-                self.table = self.dynamodb.create_table(
+                table = self.dynamodb.create_table(
                     TableName=self.table_name,
                     KeySchema=[
                         {'AttributeName': 'document_id', 'KeyType': 'HASH'},
@@ -46,20 +100,75 @@ class DynamoDBStore:
                     ],
                     AttributeDefinitions=[
                         {'AttributeName': 'document_id', 'AttributeType': 'S'},
-                        {'AttributeName': 'processed_at', 'AttributeType': 'S'}
+                        {'AttributeName': 'processed_at', 'AttributeType': 'S'},
+                        {'AttributeName': 'status', 'AttributeType': 'S'}
                     ],
+                    GlobalSecondaryIndexes=[self._status_index_spec()],
                     BillingMode='PAY_PER_REQUEST'
                 )
-                self.table.wait_until_exists()
-                logger.info(f"Created table '{self.table_name}'")
+                table.wait_until_exists()
+                logger.info("Created table '%s'", self.table_name)
+                return table
             except Exception as e:
-                logger.warning(f"Could not create table: {e}")
-                self.table = None
+                logger.warning("Could not create table: %s", e)
+                return None
+
+    def _status_index_spec(self):
+        # Payloads are compressed, so projecting everything keeps the index small and
+        # lets a status query return any attribute without a second read
+        return {
+            'IndexName': self.status_index,
+            'KeySchema': [
+                {'AttributeName': 'status', 'KeyType': 'HASH'},
+                {'AttributeName': 'processed_at', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'ALL'}
+        }
+
+    def _ensure_status_index(self, table):
+        """Add the status/processed_at GSI to a table created before it existed."""
+        indexes = table.global_secondary_indexes or []
+        if any(index['IndexName'] == self.status_index for index in indexes):
+            return
+        try:
+            table.meta.client.update_table(
+                TableName=self.table_name,
+                AttributeDefinitions=[
+                    {'AttributeName': 'status', 'AttributeType': 'S'},
+                    {'AttributeName': 'processed_at', 'AttributeType': 'S'}
+                ],
+                GlobalSecondaryIndexUpdates=[{'Create': self._status_index_spec()}]
+            )
+            logger.info("Creating index '%s' on '%s'", self.status_index, self.table_name)
+        except Exception as e:
+            logger.warning("Could not create index '%s': %s", self.status_index, e)
+
+    @staticmethod
+    def _hot_attributes(final_result):
+        """Typed top-level copies of the fields reviewers filter and sort on."""
+        attributes = {}
+        loan_type = final_result.get('loan_type')
+        if isinstance(loan_type, str):
+            attributes['loan_type'] = loan_type
+        confidences = [result.confidence for result in final_result.values() if isinstance(result, FieldResult)]
+        if confidences:
+            attributes['min_confidence'] = Decimal(str(min(confidences)))
+        for name in HOT_NUMBER_FIELDS:
+            result = final_result.get(name)
+            number = parse_number(result.value) if isinstance(result, FieldResult) else None
+            if number is not None and math.isfinite(number):
+                attributes[name] = Decimal(str(number))
+        for name in HOT_TEXT_FIELDS:
+            result = final_result.get(name)
+            if isinstance(result, FieldResult) and result.value:
+                attributes[name] = result.value
+        return attributes
 
 
     def store_result(self, state):
         """Save extraction result to DynamoDB."""
-        if self.table is None:
+        table = self.table
+        if table is None:
             logger.warning("No DynamoDB table available, skipping store")
             return None
 
@@ -68,14 +177,97 @@ class DynamoDBStore:
             'processed_at': datetime.now().isoformat(),
             'status': state['status'],
             'valid': state['validation']['valid'],
-            'fields': json.dumps(state['final_result']),
-            'guardrails_passed': state.get('guardrails', {}).get('passed', False)
+            'guardrails_passed': state.get('guardrails', {}).get('passed', False),
+            **self._hot_attributes(state['final_result']),
+            'fields_z': compress_json(state['final_result'])
         }
+        # Fingerprints let a later run recognise a resent copy of this document
+        if state.get('content_hash'):
+            item['content_sha256'] = state['content_hash']
+        if state.get('signature') is not None:
+            item['minhash'] = state['signature'].tobytes()
+        if state.get('duplicate_of'):
+            item['duplicate_of'] = state['duplicate_of']
+        if len(state.get('segments') or ()) > 1:
+            item['segments_z'] = compress_json([segment.to_dict() for segment in state['segments']])
 
         try:
-            self.table.put_item(Item=item)
-            logger.info(f"Stored result for {state['document_id']} in DynamoDB")
+            table.put_item(Item=item)
+            logger.info("Stored result for %s in DynamoDB", state['document_id'])
             return item
         except Exception as e:
-            logger.error(f"Failed to store in DynamoDB: {e}")
+            logger.error("Failed to store in DynamoDB: %s", e)
             return None
+
+    def _projection(self, attributes):
+        """ProjectionExpression and placeholder names (status, name, ... are reserved words)."""
+        names = {}
+        for attribute in attributes:
+            for stored in ((COMPRESSED_ATTRIBUTES[attribute], attribute) if attribute in COMPRESSED_ATTRIBUTES
+                           else (attribute,)):
+                names[f"#a{len(names)}"] = stored
+        return {'ProjectionExpression': ', '.join(names), 'ExpressionAttributeNames': names}
+
+    def query_by_status(self, status, limit=50, start_key=None, attributes=None, since=None, newest_first=True):
+        """One page of results with `status` from the status index.
+
+        Returns (items, next_key); pass next_key back as start_key for the
+        following page, it is None after the last one. `attributes` limits
+        what is read, e.g. SUMMARY_ATTRIBUTES for a review queue; `fields`
+        and `segments` name the compressed payloads.
+        """
+        table = self.table
+        if table is None:
+            raise RuntimeError("No DynamoDB table available")
+        condition = Key('status').eq(status)
+        if since:
+            condition = condition & Key('processed_at').gte(since)
+        request = {
+            'IndexName': self.status_index,
+            'KeyConditionExpression': condition,
+            'ScanIndexForward': not newest_first,
+            'Limit': limit
+        }
+        if attributes:
+            request.update(self._projection(attributes))
+        if start_key:
+            request['ExclusiveStartKey'] = start_key
+        response = table.query(**request)
+        return [decode_item(item) for item in response['Items']], response.get('LastEvaluatedKey')
+
+    def iter_by_status(self, status, attributes=None, since=None, page_size=100):
+        """Every result with `status`, newest first, fetched page by page."""
+        start_key = None
+        while True:
+            items, start_key = self.query_by_status(status, page_size, start_key, attributes, since)
+            yield from items
+            if start_key is None:
+                return
+
+    def iter_fingerprints(self, limit):
+        """(document_id, sha256, MinHash bytes, fields) of up to `limit` approved results that passed guardrails.
+
+        Newest first; these are the entries DuplicateIndex holds, so it can be
+        rebuilt after a restart.
+        """
+        attributes = ["document_id", "content_sha256", "minhash", "guardrails_passed", "fields"]
+        count = 0
+        for item in self.iter_by_status("approved", attributes, page_size=1000):
+            if count >= limit:
+                return
+            if not item.get("guardrails_passed") or "content_sha256" not in item or "minhash" not in item:
+                continue
+            yield item["document_id"], item["content_sha256"], item["minhash"], item.get("fields") or {}
+            count += 1
+
+    def get_latest(self, document_id, attributes=None):
+        """Most recent stored result for a document, or None."""
+        table = self.table
+        if table is None:
+            raise RuntimeError("No DynamoDB table available")
+        request = {'KeyConditionExpression': Key('document_id').eq(document_id),
+                   'ScanIndexForward': False, 'Limit': 1}
+        if attributes:
+            request.update(self._projection(attributes))
+        items = table.query(**request)['Items']
+        return decode_item(items[0]) if items else None
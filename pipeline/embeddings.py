@@ -0,0 +1,109 @@
+import logging
+import warnings
+from abc import ABC, abstractmethod
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("float32", "int8")
+PRECISIONS = ("float32", "float16", "int8")
+
+
+class EmbeddingBackend(ABC):
+    """Turns texts into L2-normalized float32 vectors, one row per text."""
+
+    name = None
+
+    @abstractmethod
+    def encode(self, texts):
+        """2-D float32 array with one normalized embedding per text."""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Full-precision SentenceTransformer, as RAG has always used."""
+
+    name = "float32"
+
+    def __init__(self, model_name=None, batch_size=None, **model_kwargs):
+        self.model_name = model_name or settings.rag.embedding_model
+        self.batch_size = batch_size or settings.rag.embedding_batch_size
+        self.model = SentenceTransformer(self.model_name, **model_kwargs)
+
+    def encode(self, texts):
+        embeddings = self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class Int8SentenceTransformerBackend(SentenceTransformerBackend):
+    """The same model with every Linear layer dynamically quantized to int8, for CPU inference.
+
+    Weights are stored as int8 and activations are quantized per batch at run
+    time, so no calibration data is needed. Embeddings stay float32.
+    """
+
+    name = "int8"
+
+    def __init__(self, model_name=None, batch_size=None):
+        import torch
+
+        super().__init__(model_name, batch_size, device="cpu")
+        with warnings.catch_warnings():
+            # torch marks eager-mode quantization deprecated in favour of torchao; it still works
+            warnings.simplefilter("ignore")
+            self.model = torch.ao.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def create_backend(name=None, model_name=None):
+    """Embedding backend named by EMBEDDING_BACKEND (float32 or int8)."""
+    name = name or settings.rag.embedding_backend
+    if name == "float32":
+        backend = SentenceTransformerBackend(model_name)
+    elif name == "int8":
+        backend = Int8SentenceTransformerBackend(model_name)
+    else:
+        raise ValueError(f"Unknown embedding backend: {name} (expected one of {', '.join(BACKENDS)})")
+    logger.info("Embedding backend: %s (%s)", backend.model_name, name)
+    return backend
+
+
+class StoredEmbeddings:
+    """Chunk embeddings kept at float32, float16 or int8, scored against a float32 query.
+
+    int8 rows are stored as round(x / scale) with a per-row scale of
+    max|x| / 127, and scores are rescaled, so int8 scores stay comparable
+    to float32 ones.
+    """
+
+    __slots__ = ("values", "scales", "precision")
+
+    def __init__(self, embeddings, precision="float32"):
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        self.precision = precision
+        self.scales = None
+        if precision == "float32":
+            self.values = embeddings
+        elif precision == "float16":
+            self.values = embeddings.astype(np.float16)
+        elif precision == "int8":
+            scales = np.abs(embeddings).max(axis=1) / 127
+            scales[scales == 0] = 1.0
+            self.values = np.rint(embeddings / scales[:, None]).astype(np.int8)
+            self.scales = scales.astype(np.float32)
+        else:
+            raise ValueError(f"Unknown embedding precision: {precision} (expected one of {', '.join(PRECISIONS)})")
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, query):
+        """Dot product of every stored row with a query vector."""
+        query = np.asarray(query, dtype=np.float32).ravel()
+        if self.precision == "int8":
+            return (self.values @ query) * self.scales
+        return self.values.astype(np.float32, copy=False) @ query
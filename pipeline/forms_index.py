@@ -0,0 +1,88 @@
+import logging
+import re
+from pipeline.table_stitcher import block_text, index_blocks, related_ids
+
+logger = logging.getLogger(__name__)
+
+# Form keys that carry each extracted field, most specific first
+FIELD_KEY_ALIASES = {
+    "borrower_name": ["borrower name", "borrower", "applicant name", "applicant", "name"],
+    "loan_amount": ["loan amount", "principal amount", "principal", "amount financed", "amount"],
+    "interest_rate": ["interest rate", "annual percentage rate", "apr", "rate"],
+    "loan_term": ["loan term", "term", "duration", "period"],
+    "monthly_payment": ["monthly payment", "payment amount", "payment"]
+}
+
+
+def normalize_key(key):
+    """'Loan Amount:' → 'loan amount'."""
+    key = re.sub(r'[^a-z0-9%()\s]', ' ', key.lower())
+    return ' '.join(key.split())
+
+
+class FormsIndex:
+    """Normalized key → value index built once from Textract KEY_VALUE_SET blocks."""
+
+    def __init__(self):
+        self._values = {}
+        self._pages = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def add(self, key, value, page=None):
+        """Keep the first value seen for a key (earlier pages win)."""
+        key = normalize_key(key)
+        if key and value and key not in self._values:
+            self._values[key] = value.strip()
+            self._pages[key] = page
+
+    def add_blocks(self, blocks, index=None, clean=None):
+        """Resolve KEY → VALUE → WORD relationships of one Textract response.
+
+        `clean` (e.g. TextCleaner.clean_value) is applied to key and value text first.
+        """
+        if index is None:
+            index = index_blocks(blocks)
+        for block in blocks:
+            if block['BlockType'] != 'KEY_VALUE_SET' or 'KEY' not in block.get('EntityTypes', ()):
+                continue
+            key = block_text(block, index)
+            values = (index.get(value_id) for value_id in related_ids(block, 'VALUE'))
+            value = ' '.join(block_text(value_block, index) for value_block in values if value_block is not None)
+            if clean is not None:
+                key, value = clean(key), clean(value)
+            self.add(key, value, block.get('Page', 1))
+        return self
+
+    @classmethod
+    def from_blocks(cls, blocks, index=None, clean=None):
+        return cls().add_blocks(blocks, index, clean)
+
+    def for_pages(self, first, last):
+        """Index of just the fields found on pages first..last, for one segment of a package."""
+        subset = FormsIndex()
+        for key, value in self._values.items():
+            page = self._pages[key]
+            if page is None or first <= page <= last:
+                subset._values[key] = value
+                subset._pages[key] = page
+        return subset
+
+    def get(self, key):
+        return self._values.get(normalize_key(key))
+
+    def lookup(self, keys):
+        """Value of the first key present, or None."""
+        for key in keys:
+            value = self._values.get(key)
+            if value is not None:
+                return value
+        return None
+
+    def field_value(self, field):
+        """Raw form value for an extraction field, via FIELD_KEY_ALIASES."""
+        return self.lookup(FIELD_KEY_ALIASES.get(field, ()))
+
+    def items(self):
+        return self._values.items()
@@ -1,5 +1,6 @@
 import logging
 import re
+from pipeline.state import FieldResult
 
 logger = logging.getLogger(__name__)
 
@@ -7,8 +8,8 @@ logger = logging.getLogger(__name__)
 class Guardrails:
     """Validates LLM outputs against source text to prevent hallucinations."""
 
-    def check(self, extracted_data, source_text):
-        """Verify extracted values actually exist in the source document."""
+    def check(self, extracted_data, source_text, forms=None):
+        """Verify extracted values exist in the document's form fields, or else in the full text."""
         issues = []
         source_lower = source_text.lower()
 
@@ -16,13 +17,19 @@ class Guardrails:
 
         for field in fields:
             data = extracted_data.get(field, {})
-            if not isinstance(data, dict):
+            if not isinstance(data, (dict, FieldResult)):
                 continue
 
             value = data.get("value")
             if value is None:
                 continue
 
+            # A matching form value verifies the field without scanning the document
+            form_value = forms.field_value(field) if forms else None
+            if form_value and self._value_in_source(value, form_value.lower()):
+                logger.debug("Verified: %s='%s' found in form fields", field, value)
+                continue
+
             # Check if the value exists in the source text
             if not self._value_in_source(value, source_lower):
                 issues.append({
@@ -31,12 +38,12 @@ class Guardrails:
                     "issue": "hallucination",
                     "message": f"{field} value '{value}' not found in source document"
                 })
-                logger.warning(f"HALLUCINATION DETECTED: {field}='{value}' not in source")
+                logger.warning("HALLUCINATION DETECTED: %s='%s' not in source", field, value)
             else:
-                logger.info(f"Verified: {field}='{value}' found in source")
+                logger.debug("Verified: %s='%s' found in source", field, value)
 
         if issues:
-            logger.warning(f"Guardrails found {len(issues)} potential hallucinations")
+            logger.warning("Guardrails found %d potential hallucinations", len(issues))
         else:
             logger.info("Guardrails passed: all values verified in source")
 
@@ -0,0 +1,97 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """Raised when the runner already holds max_workers + max_pending jobs."""
+
+
+class JobRunner:
+    """Runs extraction jobs on a bounded background executor and records progress in a JobStore."""
+
+    def __init__(self, agent, store, serialize, max_workers=None, max_pending=None, admission=None):
+        self.agent = agent
+        self.store = store
+        self.serialize = serialize
+        self.admission = admission
+        self.max_workers = max_workers or settings.jobs.max_workers
+        self.max_pending = settings.jobs.max_pending if max_pending is None else max_pending
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="extraction-job")
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        # job_id -> Future until the job finishes, so shutdown can fail the ones it cancels
+        self._futures = {}
+        logger.info("Job runner started: %d workers, %d pending slots", self.max_workers, self.max_pending)
+
+    def submit(self, document_id, profile=False, priority="backfill"):
+        """Persist a queued job and schedule it, or raise JobQueueFull.
+
+        With an AdmissionController, jobs share its in-flight slots in the given priority lane.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull(f"{self.max_workers + self.max_pending} jobs already queued or running")
+        try:
+            job = self.store.create(document_id)
+            with self._lock:
+                self._queued += 1
+            future = self._executor.submit(self._run, job["job_id"], document_id, profile, priority)
+            with self._lock:
+                self._futures[job["job_id"]] = future
+            future.add_done_callback(lambda _, job_id=job["job_id"]: self._forget(job_id))
+        except Exception:
+            self._slots.release()
+            raise
+        logger.info("Queued job %s for %s", job['job_id'], document_id)
+        return job
+
+    def _run(self, job_id, document_id, profile, priority):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+        try:
+            self.store.mark_running(job_id)
+
+            def on_step(step, status, duration_ms=None):
+                self.store.record_step(job_id, step, status, duration_ms)
+
+            slot = self.admission.admit(priority, bounded=False, exclusive=profile) if self.admission else nullcontext()
+            with slot:
+                state = self.agent.run(document_id, profile=profile, on_step=on_step)
+            self.store.complete(job_id, self.serialize(state))
+            logger.info("Job %s succeeded", job_id)
+        except Exception as e:
+            logger.error("Job %s failed: %s", job_id, e)
+            self.store.fail(job_id, str(e))
+        finally:
+            with self._lock:
+                self._running -= 1
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {"queued": self._queued, "running": self._running,
+                    "capacity": self.max_workers + self.max_pending}
+
+    def _forget(self, job_id):
+        with self._lock:
+            self._futures.pop(job_id, None)
+
+    def shutdown(self, wait=True):
+        """Fail jobs that have not started; running jobs finish first when wait=True."""
+        with self._lock:
+            futures = list(self._futures.items())
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        cancelled = [job_id for job_id, future in futures if future.cancelled()]
+        for job_id in cancelled:
+            self.store.fail(job_id, "Cancelled: the server shut down before the job started")
+        if cancelled:
+            logger.warning("Failed %d queued jobs at shutdown", len(cancelled))
+        if wait:
+            self._executor.shutdown(wait=True)
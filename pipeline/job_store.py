@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from datetime import datetime
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("succeeded", "failed")
+INTERRUPTED_ERROR = "Interrupted: the worker running this job stopped before it finished"
+
+
+def _pid_alive(pid):
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    """Persists extraction jobs and their step progress in a local SQLite table.
+
+    The file can be shared by several API worker processes on one host, so any
+    worker can answer status polls for a job another worker is running. Each
+    job records the worker (host:pid) that queued it. On open, queued or
+    running jobs whose worker no longer exists are marked failed, so jobs cut
+    off by a restart or crash do not stay in progress forever.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or settings.jobs.db_path
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    document_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    current_step TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )""")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_steps (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    step TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    duration_ms REAL,
+                    at TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )""")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            if "worker" not in columns:
+                self._conn.execute("ALTER TABLE jobs ADD COLUMN worker TEXT")
+        logger.info("Job store ready at %s", self.db_path)
+        interrupted = self._fail_interrupted()
+        if interrupted:
+            logger.warning("Marked %d interrupted jobs as failed", interrupted)
+
+    def _worker_gone(self, worker):
+        """True if the process that owns a job has exited; workers on other hosts are assumed alive."""
+        if worker is None or worker == self.worker_id:
+            # Jobs from before workers were recorded, or from an earlier process that had our pid
+            return True
+        host, _, pid = worker.rpartition(":")
+        return host == socket.gethostname() and pid.isdigit() and not _pid_alive(int(pid))
+
+    def _fail_interrupted(self):
+        """On open: mark queued/running jobs whose worker has exited as failed; returns how many."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, worker FROM jobs WHERE status NOT IN (?, ?)", TERMINAL_STATUSES).fetchall()
+        stale = [row["job_id"] for row in rows if self._worker_gone(row["worker"])]
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET status = 'failed', error = ?, updated_at = ? "
+                "WHERE job_id = ? AND status NOT IN (?, ?)",
+                [(INTERRUPTED_ERROR, now, job_id, *TERMINAL_STATUSES) for job_id in stale])
+        return len(stale)
+
+    def create(self, document_id):
+        now = datetime.now().isoformat()
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, document_id, status, worker, created_at, updated_at) "
+                "VALUES (?, ?, 'queued', ?, ?, ?)",
+                (job_id, document_id, self.worker_id, now, now))
+        return {"job_id": job_id, "document_id": document_id, "status": "queued", "created_at": now}
+
+    def _update(self, job_id, **columns):
+        columns["updated_at"] = datetime.now().isoformat()
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE job_id = ?", (*columns.values(), job_id))
+
+    def mark_running(self, job_id):
+        self._update(job_id, status="running")
+
+    def record_step(self, job_id, step, status, duration_ms=None):
+        """Append a step event; the latest step is also the job's current_step."""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO job_steps (job_id, seq, step, status, duration_ms, at) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ?, ?, ?, ? FROM job_steps WHERE job_id = ?",
+                (job_id, step, status, duration_ms, now, job_id))
+            self._conn.execute("UPDATE jobs SET current_step = ?, updated_at = ? WHERE job_id = ?",
+                               (step, now, job_id))
+
+    def complete(self, job_id, result):
+        self._update(job_id, status="succeeded", result=json.dumps(result, default=str))
+
+    def fail(self, job_id, error):
+        self._update(job_id, status="failed", error=error)
+
+    def get(self, job_id):
+        """Job row with its decoded result, or None."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def steps(self, job_id, after_seq=0):
+        """Step events with seq > after_seq, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, step, status, duration_ms, at FROM job_steps WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after_seq)).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
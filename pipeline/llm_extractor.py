@@ -1,6 +1,8 @@
 import logging
 import json
 from config.settings import Settings
+from pipeline.monitoring import span
+from pipeline.simulation import llm_simulator
 
 logger = logging.getLogger(__name__)
 
@@ -10,6 +12,7 @@ class LLMExtractor:
 
     def __init__(self):
         self.settings = Settings()
+        self.simulators = {"gpt-4": llm_simulator("gpt-4"), "claude": llm_simulator("claude")}
         self.prompt_template = """You are a loan document extraction expert.
 Extract the following fields from this loan document text.
 Return ONLY valid JSON with these fields:
@@ -29,41 +32,48 @@ JSON response:"""
     def extract(self, text):
         """Extract fields using LLM with fallback."""
         prompt = self.prompt_template.format(text=text)
-        logger.info("Sending document to LLM for extraction...")
+        logger.debug("Sending document to LLM for extraction...")
 
         try:
             # Try GPT-4 first (Azure OpenAI)
             result = self._call_gpt4(text)
             return result
         except Exception as e:
-            logger.warning(f"GPT-4 failed: {e}, falling back to Claude")
+            logger.warning("GPT-4 failed: %s, falling back to Claude", e)
             try:
                 # Fallback to Claude (AWS Bedrock)
                 result = self._call_claude(text)
                 return result
             except Exception as e:
-                logger.error(f"Both LLMs failed: {e}")
+                logger.error("Both LLMs failed: %s", e)
                 return None
 
     def _call_gpt4(self, text):
         """Call GPT-4 via Azure OpenAI."""
         # In production: openai.chat.completions.create(...)
         # For now: mock response
-        logger.info("Calling GPT-4 (mock)...")
-        return self._mock_llm_response(text)
+        logger.debug("Calling GPT-4 (mock)...")
+        with span("LLM GPT-4", provider="azure_openai"):
+            return self._mock_llm_response(text, "gpt-4")
 
     def _call_claude(self, text):
         """Call Claude via AWS Bedrock."""
         # In production: bedrock.invoke_model(...)
         # For now: mock response
-        logger.info("Calling Claude (mock)...")
-        return self._mock_llm_response(text)
+        logger.debug("Calling Claude (mock)...")
+        with span("LLM Claude", provider="bedrock"):
+            return self._mock_llm_response(text, "claude")
 
 
-    def _mock_llm_response(self, text):
+    def _mock_llm_response(self, text, model="gpt-4"):
         """Simulate GPT-4 response for local testing."""
         # In production, this calls real GPT-4
         # GPT-4 understands meaning, not just patterns
+        simulator = self.simulators.get(model)
+        if simulator is not None:
+            # ~4 characters per token; latency grows with the prompt
+            prompt_tokens = len(self.prompt_template.format(text=text)) / 4
+            simulator.call_with_retries(units=prompt_tokens / 1000)
         response = {
             "borrower_name": {"value": "John Smith", "confidence": 0.95, "method": "llm"},
             "loan_amount": {"value": "25000", "confidence": 0.97, "method": "llm"},
@@ -72,5 +82,5 @@ JSON response:"""
             "monthly_payment": {"value": "483.15", "confidence": 0.93, "method": "llm"},
             "loan_type": "personal_loan"
         }
-        logger.info("Using mock LLM response (no API key)")
+        logger.debug("Using mock LLM response (no API key)")
         return response
@@ -0,0 +1,149 @@
+import atexit
+import contextvars
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from config.settings import settings
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(document_id)s] %(message)s"
+
+# (document_id, trace_id, debug sampled) of the pipeline run on this thread/task
+_log_context = contextvars.ContextVar("log_context", default=None)
+_lock = threading.Lock()
+_listener = None
+_handler = None
+
+
+def bind_document(document_id, trace_id):
+    """Tag records logged in the current context with a document and trace id; returns a reset token.
+
+    Whether the run's DEBUG records are kept is decided here, once per
+    document, so a sampled document keeps all of its per-field records.
+    """
+    rate = settings.monitoring.log_debug_sample_rate
+    sampled = rate >= 1.0 or (zlib.crc32(trace_id.encode()) % 10000) < rate * 10000
+    return _log_context.set((document_id, trace_id, sampled))
+
+
+def unbind_document(token):
+    _log_context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Adds document_id/trace_id to every record and samples DEBUG records.
+
+    Runs on the logging thread, before the record is queued, so it sees that
+    thread's context.
+    """
+
+    def __init__(self, debug_sample_rate=1.0):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        context = _log_context.get()
+        if context is None:
+            record.document_id = record.trace_id = "-"
+            return record.levelno > logging.DEBUG or random.random() < self.debug_sample_rate
+        record.document_id, record.trace_id, sampled = context
+        return record.levelno > logging.DEBUG or sampled
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        document_id = getattr(record, "document_id", "-")
+        if document_id != "-":
+            entry["document_id"] = document_id
+            entry["trace_id"] = record.trace_id
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """Queues records unformatted, so %-style messages are built on the listener thread.
+
+    The stock QueueHandler formats in prepare() on the calling thread. Log
+    arguments must therefore not be mutated after the call. The queue is a
+    lock-free SimpleQueue. Beyond `max_size` queued records, new ones are
+    dropped and counted rather than blocking a request.
+    """
+
+    def __init__(self, max_size):
+        super().__init__(queue.SimpleQueue())
+        self.max_size = max_size
+        self.dropped = 0
+        self._dropped_lock = threading.Lock()
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        if self.queue.qsize() >= self.max_size:
+            with self._dropped_lock:
+                self.dropped += 1
+            return
+        self.queue.put_nowait(record)
+
+
+def configure_logging(level=None, log_format=None):
+    """Route all logging through a bounded queue to a background thread that formats and writes.
+
+    LOG_LEVEL, LOG_FORMAT (json or text), LOG_DEBUG_SAMPLE_RATE and
+    LOG_QUEUE_SIZE come from settings.monitoring. Safe to call more than once.
+    """
+    global _listener, _handler
+    config = settings.monitoring
+    with _lock:
+        if _listener is not None:
+            return _listener
+        stream = logging.StreamHandler(sys.stderr)
+        if (log_format or config.log_format).lower() == "json":
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+        # Process details are never written; skipping them makes each LogRecord cheaper
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        _handler = DeferredQueueHandler(config.log_queue_size)
+        _handler.addFilter(ContextFilter(config.log_debug_sample_rate))
+        root = logging.getLogger()
+        for existing in root.handlers[:]:
+            root.removeHandler(existing)
+        root.addHandler(_handler)
+        root.setLevel((level or config.log_level).upper())
+
+        _listener = QueueListener(_handler.queue, stream)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Write out queued records and stop the background thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def dropped_records():
+    """Records dropped because the log queue was full."""
+    return _handler.dropped if _handler is not None else 0
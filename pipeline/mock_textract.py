@@ -1,4 +1,7 @@
 import logging
+from botocore.exceptions import ClientError
+from pipeline.simulation import SimulatedFailure, SimulatedThrottle, textract_simulator
+from pipeline.synthetic_documents import synthetic_from_document_id
 
 logger = logging.getLogger(__name__)
 
@@ -6,12 +9,41 @@ logger = logging.getLogger(__name__)
 class MockTextract:
     """Simulates AWS Textract for local testing."""
 
+    def __init__(self, simulator=None):
+        self.simulator = simulator if simulator is not None else textract_simulator()
+
     def analyze_document(self, Document, FeatureTypes):
         """Return fake Textract response like real AWS would."""
         logger.info("MockTextract: Analyzing document...")
+        document_id = Document['S3Object']['Name']
+
+        # Synthetic document and package ids (see synthetic_documents.py) get matching generated blocks
+        synthetic = synthetic_from_document_id(document_id)
+        if synthetic is not None:
+            response = synthetic.to_response()
+        else:
+            response = self._sample_response()
+
+        if self.simulator is not None:
+            self._simulate_call(response['DocumentMetadata']['Pages'])
+
+        logger.debug("MockTextract: Returned %d blocks", len(response['Blocks']))
+        return response
+
+    def _simulate_call(self, pages):
+        """Add service latency and surface simulated errors the way boto3 would, after its retries."""
+        try:
+            self.simulator.call_with_retries(units=pages)
+        except SimulatedThrottle as e:
+            raise ClientError({'Error': {'Code': 'ThrottlingException', 'Message': str(e)}}, 'AnalyzeDocument')
+        except SimulatedFailure as e:
+            raise ClientError({'Error': {'Code': 'InternalServerError', 'Message': str(e)}}, 'AnalyzeDocument')
 
+    def _sample_response(self):
+        """The fixed one-page personal loan used by main.py and the API examples."""
         # This is what real Textract returns - a list of blocks
         response = {
+            'DocumentMetadata': {'Pages': 1},
             'Blocks': [
                 {
                     'BlockType': 'PAGE',
@@ -50,6 +82,23 @@ class MockTextract:
                 }
             ]
         }
-
-        logger.info(f"MockTextract: Returned {len(response['Blocks'])} blocks")
+        response['Blocks'].extend(self._form_blocks(response['Blocks']))
         return response
+
+    def _form_blocks(self, blocks):
+        """WORD and KEY_VALUE_SET blocks for each 'Key: Value' line, as FORMS analysis returns."""
+        extra = []
+        for line in blocks:
+            if line['BlockType'] != 'LINE' or ':' not in line['Text']:
+                continue
+            key_text, value_text = line['Text'].split(':', 1)
+            key_words = [f"{line['Id']}-word-{i}" for i, _ in enumerate((key_text + ':').split())]
+            value_words = [f"{line['Id']}-word-{len(key_words) + i}" for i, _ in enumerate(value_text.split())]
+            for word_id, word in zip(key_words + value_words, (key_text + ':').split() + value_text.split()):
+                extra.append({'BlockType': 'WORD', 'Text': word, 'Id': word_id})
+            extra.append({'BlockType': 'KEY_VALUE_SET', 'EntityTypes': ['KEY'], 'Id': f"{line['Id']}-key",
+                          'Relationships': [{'Type': 'VALUE', 'Ids': [f"{line['Id']}-value"]},
+                                            {'Type': 'CHILD', 'Ids': key_words}]})
+            extra.append({'BlockType': 'KEY_VALUE_SET', 'EntityTypes': ['VALUE'], 'Id': f"{line['Id']}-value",
+                          'Relationships': [{'Type': 'CHILD', 'Ids': value_words}]})
+        return extra
@@ -1,32 +1,183 @@
+import contextvars
+import itertools
+import json
 import logging
+import random
+import threading
 import time
+import uuid
+from collections import deque
 from datetime import datetime
+from config.settings import settings
+from pipeline.logging_config import bind_document, unbind_document
 
 logger = logging.getLogger(__name__)
 
+# Innermost open span for the current thread/task, so nested components
+# (RAG, LLM providers, Textract) can attach child spans without a monitor handle.
+_active_span = contextvars.ContextVar("active_span", default=None)
+_export_lock = threading.Lock()
+
+
+class Span:
+    """A timed unit of work inside a trace: wall time, CPU time, status and parent."""
+
+    __slots__ = ("name", "span_id", "parent", "attributes", "status", "error",
+                 "start_ms", "wall_ms", "cpu_ms", "monitor", "_wall_start", "_cpu_start", "_token")
+
+    def __init__(self, name, monitor, parent=None, attributes=None):
+        self.name = name
+        self.monitor = monitor
+        self.parent = parent
+        self.span_id = monitor._new_span_id()
+        self.attributes = attributes or {}
+        self.status = "success"
+        self.error = None
+        self.start_ms = 0.0
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self._token = None
+
+    @property
+    def sampled(self):
+        return self.monitor.current_trace is not None and self.monitor.current_trace["sampled"]
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def __enter__(self):
+        self._token = _active_span.set(self)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        self.start_ms = (self._wall_start - self.monitor.start_time) * 1000
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        self.cpu_ms = (time.thread_time() - self._cpu_start) * 1000
+        if exc_type is not None:
+            self.status = "error"
+            self.error = f"{exc_type.__name__}: {exc}"
+        _active_span.reset(self._token)
+        self.monitor._finish_span(self)
+        return False
+
+    def to_dict(self):
+        span = {
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_ms": round(self.start_ms, 3),
+            "wall_ms": round(self.wall_ms, 3),
+            "cpu_ms": round(self.cpu_ms, 3),
+            "status": self.status
+        }
+        if self.error:
+            span["error"] = self.error
+        if self.attributes:
+            span["attributes"] = self.attributes
+        return span
+
+
+class _NoopSpan:
+    """Returned outside a sampled trace so untraced calls pay only a lookup."""
+
+    __slots__ = ()
+
+    def set_attribute(self, key, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _Run:
+    """State of one pipeline run. Held in a context variable, so worker threads
+    started with contextvars.copy_context() add spans and LLM calls to the same trace."""
+
+    __slots__ = ("start_time", "spans", "span_ids", "trace", "root", "lock", "log_token")
+
+    def __init__(self, trace):
+        self.start_time = time.perf_counter()
+        self.spans = []
+        self.span_ids = itertools.count(1)
+        self.trace = trace
+        self.root = None
+        self.lock = threading.Lock()
+        self.log_token = None
+
+
+def span(name, **attributes):
+    """Open a child span under the active span, or a no-op when the trace is not sampled."""
+    parent = _active_span.get()
+    if parent is None or not parent.sampled:
+        return _NOOP_SPAN
+    return Span(name, parent.monitor, parent, attributes)
+
 
 class PipelineMonitor:
     """Tracks pipeline performance, LLM calls, and costs."""
 
-    def __init__(self):
-        self.traces = []
-        self.start_time = None
+    def __init__(self, sample_rate=None, trace_file=None):
+        # Recent run summaries only; a long-lived API process would otherwise grow without bound
+        self.traces = deque(maxlen=settings.monitoring.trace_history)
+        self.sample_rate = settings.monitoring.trace_sample_rate if sample_rate is None else sample_rate
+        self.trace_file = settings.monitoring.trace_file if trace_file is None else trace_file
+        # Per-run state is context-local so one monitor can serve concurrent requests
+        self._run = contextvars.ContextVar(f"pipeline_run_{id(self)}", default=None)
         logger.info("Pipeline monitor initialized")
 
+    @property
+    def current_trace(self):
+        run = self._run.get()
+        return run.trace if run is not None else None
+
+    @property
+    def start_time(self):
+        run = self._run.get()
+        return run.start_time if run is not None else None
+
     def start_trace(self, document_id):
         """Start tracking a pipeline run."""
-        self.start_time = time.time()
-        self.current_trace = {
+        run = _Run({
+            "trace_id": uuid.uuid4().hex,
             "document_id": document_id,
             "started_at": datetime.now().isoformat(),
+            "sampled": random.random() < self.sample_rate,
             "steps": [],
             "llm_calls": [],
             "total_tokens": 0,
             "total_cost": 0.0
-        }
-        logger.info(f"Trace started for {document_id}")
+        })
+        self._run.set(run)
+        # Records logged during the run carry its document and trace id
+        run.log_token = bind_document(document_id, run.trace["trace_id"])
+        run.root = Span("Pipeline", self, attributes={"document_id": document_id})
+        run.root.__enter__()
+        logger.info("Trace started for %s", document_id)
+
+    def span(self, name, **attributes):
+        """Time a pipeline step; spans directly under the root are also logged as steps."""
+        parent = _active_span.get() or self._run.get().root
+        return Span(name, self, parent, attributes)
 
-    def log_step(self, step_name, duration_ms, status="success"):
+    def _new_span_id(self):
+        return next(self._run.get().span_ids)
+
+    def _finish_span(self, finished):
+        run = self._run.get()
+        if finished.parent is not None and finished.parent is run.root:
+            self.log_step(finished.name, finished.wall_ms, finished.status, cpu_ms=finished.cpu_ms)
+        if run.trace["sampled"]:
+            run.spans.append(finished.to_dict())
+
+    def log_step(self, step_name, duration_ms, status="success", cpu_ms=None):
         """Log a pipeline step."""
         step = {
             "step": step_name,
@@ -34,8 +185,10 @@ class PipelineMonitor:
             "status": status,
             "timestamp": datetime.now().isoformat()
         }
+        if cpu_ms is not None:
+            step["cpu_ms"] = round(cpu_ms, 2)
         self.current_trace["steps"].append(step)
-        logger.info(f"MONITOR | {step_name}: {duration_ms:.0f}ms ({status})")
+        logger.debug("MONITOR | %s: %.0fms (%s)", step_name, duration_ms, status)
 
     def log_llm_call(self, model, input_tokens, output_tokens):
         """Track LLM API call and cost."""
@@ -57,19 +210,40 @@ class PipelineMonitor:
             "cost": round(call_cost, 6),
             "timestamp": datetime.now().isoformat()
         }
-        self.current_trace["llm_calls"].append(llm_call)
-        self.current_trace["total_tokens"] += input_tokens + output_tokens
-        self.current_trace["total_cost"] += call_cost
-        logger.info(f"MONITOR | LLM call: {model} | tokens: {input_tokens}+{output_tokens} | cost: ${call_cost:.4f}")
+        run = self._run.get()
+        with run.lock:
+            run.trace["llm_calls"].append(llm_call)
+            run.trace["total_tokens"] += input_tokens + output_tokens
+            run.trace["total_cost"] += call_cost
+        logger.debug("MONITOR | LLM call: %s | tokens: %d+%d | cost: $%.4f", model, input_tokens, output_tokens, call_cost)
 
-    def end_trace(self):
+    def end_trace(self, status="success"):
         """End tracking and return summary."""
-        duration = time.time() - self.start_time
-        self.current_trace["total_duration_ms"] = round(duration * 1000, 2)
-        self.current_trace["ended_at"] = datetime.now().isoformat()
-        self.traces.append(self.current_trace)
-
-        logger.info(f"MONITOR | Pipeline complete: {duration*1000:.0f}ms | "
-                     f"tokens: {self.current_trace['total_tokens']} | "
-                     f"cost: ${self.current_trace['total_cost']:.4f}")
-        return self.current_trace
+        run = self._run.get()
+        run.root.status = status
+        run.root.__exit__(None, None, None)
+        trace = run.trace
+        trace["status"] = status
+        trace["total_duration_ms"] = round(run.root.wall_ms, 2)
+        trace["total_cpu_ms"] = round(run.root.cpu_ms, 2)
+        trace["ended_at"] = datetime.now().isoformat()
+        if trace["sampled"]:
+            trace["spans"] = run.spans
+            self._export(trace)
+        self.traces.append(trace)
+
+        logger.info("MONITOR | Pipeline complete: %.0fms | tokens: %d | cost: $%.4f",
+                    run.root.wall_ms, trace['total_tokens'], trace['total_cost'])
+        unbind_document(run.log_token)
+        return trace
+
+    def _export(self, trace):
+        """Append a sampled trace to the local trace file as one JSON line."""
+        if not self.trace_file:
+            return
+        try:
+            line = json.dumps(trace, default=str)
+            with _export_lock, open(self.trace_file, "a") as f:
+                f.write(line + "\n")
+        except OSError as e:
+            logger.warning("Could not export trace to %s: %s", self.trace_file, e)
@@ -0,0 +1,146 @@
+import contextvars
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# cProfile and tracemalloc are process-wide, so profiled runs take turns.
+_profile_lock = threading.Lock()
+# From 3.12 cProfile runs on sys.monitoring: one profiler sees every thread, and a second one can't be enabled
+_PER_THREAD = sys.version_info < (3, 12)
+# The RunProfiler of the run executing in this context, for work it hands to other threads
+_active = contextvars.ContextVar("active_profiler", default=None)
+
+
+def profile_thread():
+    """Profile the calling thread for the profiled run of this context; a no-op otherwise.
+
+    For tasks a run submits to a thread pool (in a copy of its context), which
+    the run's own cProfile cannot see before Python 3.12. From 3.12 the run's
+    profiler already records them.
+    """
+    profiler = _active.get()
+    if not _PER_THREAD or profiler is None or profiler._thread_id == threading.get_ident():
+        return nullcontext()
+    return profiler._profile_thread()
+
+
+class RunProfiler:
+    """Captures a CPU profile and allocation snapshot for one pipeline run.
+
+    Before Python 3.12 cProfile only sees the thread that enables it, so work
+    the run hands to other threads is profiled through profile_thread() and
+    merged in. From 3.12 it records every thread in the process. tracemalloc
+    traces every allocation in the process, so while a profile runs, the
+    requests running beside it are slowed down too.
+    """
+
+    def __init__(self, document_id, output_dir=None, top_n=None):
+        self.document_id = document_id
+        self.output_dir = output_dir or settings.monitoring.profile_dir
+        self.top_n = top_n or settings.monitoring.profile_top_n
+        self.summary = None
+        self._profiler = None
+        self._thread_profilers = []
+        self._thread_id = None
+        self._token = None
+        self._owns_tracemalloc = False
+
+    def __enter__(self):
+        _profile_lock.acquire()
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._thread_id = threading.get_ident()
+        self._token = _active.set(self)
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+        logger.info("Profiling run for %s", self.document_id)
+        return self
+
+    @contextmanager
+    def _profile_thread(self):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._thread_profilers.append(profiler)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._profiler.disable()
+        _active.reset(self._token)
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+        finally:
+            _profile_lock.release()
+
+        stats = pstats.Stats(self._profiler)
+        for profiler in self._thread_profilers:
+            stats.add(profiler)
+        self.summary = {
+            "cpu_top": self._cpu_top(stats),
+            "alloc_top": self._alloc_top(snapshot),
+            "peak_memory_kb": round(peak / 1024, 1),
+            "threads_profiled": 1 + len(self._thread_profilers),
+            "artifacts": self._write_artifacts(stats, snapshot)
+        }
+        return False
+
+    def _cpu_top(self, stats):
+        """Top-N functions by self time, over every profiled thread."""
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)
+        top = []
+        for (filename, line, func), (cc, ncalls, tottime, cumtime, _) in rows[:self.top_n]:
+            top.append({
+                "function": f"{os.path.basename(filename)}:{line}({func})",
+                "ncalls": ncalls,
+                "tottime_ms": round(tottime * 1000, 3),
+                "cumtime_ms": round(cumtime * 1000, 3)
+            })
+        return top
+
+    def _alloc_top(self, snapshot):
+        """Top-N source lines by memory still allocated at the end of the run."""
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__)
+        ])
+        top = []
+        for stat in snapshot.statistics("lineno")[:self.top_n]:
+            frame = stat.traceback[0]
+            top.append({
+                "location": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count
+            })
+        return top
+
+    def _write_artifacts(self, stats, snapshot):
+        """Write the full CPU profile and allocation snapshot to disk."""
+        safe_id = re.sub(r'[^A-Za-z0-9._-]', '_', self.document_id)
+        stem = os.path.join(self.output_dir, f"{safe_id}-{datetime.now():%Y%m%dT%H%M%S%f}")
+        artifacts = {"cpu_profile": f"{stem}.prof", "alloc_snapshot": f"{stem}.tracemalloc"}
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stats.dump_stats(artifacts["cpu_profile"])
+            snapshot.dump(artifacts["alloc_snapshot"])
+            logger.info("Profile written to %s.*", stem)
+        except OSError as e:
+            logger.warning("Could not write profile artifacts: %s", e)
+            return {}
+        return artifacts
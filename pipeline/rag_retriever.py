@@ -1,46 +1,78 @@
 import logging
+import threading
 import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
+from config.settings import settings
+from pipeline.embeddings import StoredEmbeddings, create_backend
+from pipeline.monitoring import span
 
 logger = logging.getLogger(__name__)
 
 
+def text_splitter():
+    """The splitter RAGRetriever chunks documents with."""
+    return RecursiveCharacterTextSplitter(
+        chunk_size=500,
+        chunk_overlap=50,
+        separators=["\n\n", "\n", ". ", " "]
+    )
+
+
 class RAGRetriever:
     """Chunks documents, creates embeddings, and retrieves relevant sections."""
 
-    def __init__(self):
-        self.splitter = RecursiveCharacterTextSplitter(
-            chunk_size=500,
-            chunk_overlap=50,
-            separators=["\n\n", "\n", ". ", " "]
-        )
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2')
-        self.chunks = []
-        self.embeddings = None
+    def __init__(self, backend=None, precision=None):
+        """Embeds with `backend` (default EMBEDDING_BACKEND) and stores chunks at `precision` (default EMBEDDING_PRECISION)."""
+        self.splitter = text_splitter()
+        self.backend = backend or create_backend()
+        self.precision = precision or settings.rag.embedding_precision
+        # The stored document is per thread so concurrent requests don't retrieve each other's chunks
+        self._local = threading.local()
         logger.info("RAG Retriever initialized")
 
+    @property
+    def chunks(self):
+        return getattr(self._local, "chunks", [])
+
+    @chunks.setter
+    def chunks(self, value):
+        self._local.chunks = value
+
+    @property
+    def embeddings(self):
+        return getattr(self._local, "embeddings", None)
+
+    @embeddings.setter
+    def embeddings(self, value):
+        self._local.embeddings = value
+
     def store_document(self, document_id, text):
         """Split text into chunks and create embeddings."""
-        self.chunks = self.splitter.split_text(text)
-        logger.info(f"Split document into {len(self.chunks)} chunks")
+        with span("RAG Split", chars=len(text)):
+            self.chunks = self.splitter.split_text(text)
+        logger.debug("Split document into %d chunks", len(self.chunks))
 
-        self.embeddings = self.embedding_model.encode(self.chunks)
-        logger.info(f"Created embeddings for {len(self.chunks)} chunks")
+        with span("RAG Embed", chunks=len(self.chunks)):
+            self.embeddings = StoredEmbeddings(self.backend.encode(self.chunks), self.precision)
+        logger.debug("Created embeddings for %d chunks", len(self.chunks))
         return self.chunks
 
+    def clear(self):
+        """Release this thread's stored chunks and embeddings."""
+        self._local.__dict__.clear()
+
     def retrieve(self, query, n_results=3):
         """Find the most relevant chunks for a question."""
         if not self.chunks:
             return []
 
-        query_embedding = self.embedding_model.encode([query])
+        with span("RAG Query Embed"):
+            query_embedding = self.backend.encode([query])[0]
 
-        # Calculate similarity scores
-        scores = np.dot(self.embeddings, query_embedding.T).flatten()
+        scores = self.embeddings.scores(query_embedding)
         top_indices = np.argsort(scores)[-n_results:][::-1]
 
         results = [self.chunks[i] for i in top_indices]
-        logger.info(f"Retrieved {len(results)} relevant chunks for: '{query}'")
+        logger.debug("Retrieved %d relevant chunks for: '%s'", len(results), query)
         return results
 
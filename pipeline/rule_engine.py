@@ -17,27 +17,60 @@ class RuleEngine:
             "loan_term": r"(?:term|duration|period)\s*[:\-]\s*(\d+)\s*(?:months|month)",
             "monthly_payment": r"(?:monthly payment|payment)\s*[:\-]\s*\$?([\d,]+\.?\d*)"
         }
+        # Applied to a form value already looked up by key
+        self.value_patterns = {
+            "borrower_name": r"([A-Z][a-z]+ [A-Z][a-z]+)",
+            "loan_amount": r"\$?([\d,]+\.?\d*)",
+            "interest_rate": r"([\d.]+)\s*%",
+            "loan_term": r"(\d+)\s*(?:months|month)",
+            "monthly_payment": r"\$?([\d,]+\.?\d*)"
+        }
+        self._compiled = {name: re.compile(p, re.IGNORECASE) for name, p in self.patterns.items()}
+        self._compiled_values = {name: re.compile(p, re.IGNORECASE) for name, p in self.value_patterns.items()}
+        # Any field label followed by ':' or '-'; matched against lower-cased text
+        self._label_cue = re.compile(
+            r"(?:borrower|applicant|name|amount|principal|rate|apr|term|duration|period|payment)\s*[:\-]")
+
+    def has_field_cues(self, text):
+        """True if any field pattern ("Loan Amount: $...") matches, i.e. the text states loan terms."""
+        # Case-insensitive alternations are slow on long pages; the label scan rules most pages out first
+        if not self._label_cue.search(text.lower()):
+            return False
+        return any(pattern.search(text) for pattern in self._compiled.values())
 
-    def extract(self, text, loan_type):
-        """Extract fields from document text using regex patterns."""
+    def extract(self, text, loan_type, forms=None):
+        """Extract fields, looking up Textract form keys first and scanning the full text only as a fallback."""
         results = {}
 
-        for field_name, pattern in self.patterns.items():
-            match = re.search(pattern, text, re.IGNORECASE)
+        for field_name, pattern in self._compiled.items():
+            if forms:
+                form_value = forms.field_value(field_name)
+                match = self._compiled_values[field_name].search(form_value) if form_value else None
+                if match:
+                    results[field_name] = {
+                        "value": match.group(1),
+                        "confidence": 0.90,
+                        "method": "rule_based",
+                        "source": "forms"
+                    }
+                    logger.debug("Found %s in form fields: %s", field_name, match.group(1))
+                    continue
+
+            match = pattern.search(text)
             if match:
                 results[field_name] = {
                     "value": match.group(1),
                     "confidence": 0.85,
                     "method": "rule_based"
                 }
-                logger.info(f"Found {field_name}: {match.group(1)}")
+                logger.debug("Found %s: %s", field_name, match.group(1))
             else:
                 results[field_name] = {
                     "value": None,
                     "confidence": 0.0,
                     "method": "rule_based"
                 }
-                logger.warning(f"Could not find {field_name}")
+                logger.debug("Could not find %s", field_name)
 
         results["loan_type"] = loan_type
         return results
\ No newline at end of file
@@ -0,0 +1,111 @@
+import logging
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Segment:
+    """Contiguous pages of a loan package that form one sub-document (note, disclosure, SBA form, ...)."""
+
+    __slots__ = ("first_page", "last_page", "loan_type", "confidence", "relevant", "texts",
+                 "rule_result", "llm_result", "fields")
+
+    def __init__(self, page, text, loan_type, confidence, relevant):
+        self.first_page = page
+        self.last_page = page
+        self.loan_type = loan_type
+        self.confidence = confidence
+        self.relevant = relevant
+        self.texts = [text]
+        self.rule_result = None
+        self.llm_result = None
+        self.fields = None
+
+    @property
+    def page_count(self):
+        return self.last_page - self.first_page + 1
+
+    @property
+    def text(self):
+        return ' '.join(text for text in self.texts if text)
+
+    def accepts(self, page, loan_type, relevant):
+        """Whether the next page continues this segment."""
+        if page != self.last_page + 1 or relevant != self.relevant:
+            return False
+        # Untyped pages continue whatever came before; typed pages must agree
+        return not relevant or loan_type is None or self.loan_type in (None, loan_type)
+
+    def add_page(self, page, text, loan_type, confidence):
+        self.last_page = page
+        self.texts.append(text)
+        if loan_type is not None and confidence > self.confidence:
+            self.loan_type, self.confidence = loan_type, confidence
+
+    def found_fields(self):
+        """Number of fields with a value in this segment's result."""
+        if not self.fields:
+            return 0
+        return sum(1 for result in self.fields.values() if hasattr(result, "value") and result.value is not None)
+
+    def to_dict(self):
+        segment = {
+            "pages": [self.first_page, self.last_page],
+            "loan_type": self.loan_type,
+            "confidence": round(self.confidence, 2),
+            "relevant": self.relevant
+        }
+        if self.fields is not None:
+            segment["fields"] = {name: result.to_dict() if hasattr(result, "to_dict") else result
+                                 for name, result in self.fields.items()}
+        return segment
+
+
+class PageSegmenter:
+    """Classifies each page and groups contiguous pages into sub-documents.
+
+    A page is relevant when it states loan terms ("Loan Amount: ...") or
+    scores at least `min_page_score` for some loan type; boilerplate
+    disclosures and amortization schedules are neither, so they are grouped
+    into skipped segments and never reach RAG or the LLM.
+    """
+
+    def __init__(self, classifier, rule_engine, min_page_score=None):
+        self.classifier = classifier
+        self.rule_engine = rule_engine
+        self.min_page_score = settings.segmentation.min_page_score if min_page_score is None else min_page_score
+
+    def classify_page(self, text):
+        """(loan_type or None, score, relevant) for one page of text."""
+        loan_type, score = self.classifier.score(text)
+        if score < self.min_page_score:
+            loan_type = None
+        relevant = loan_type is not None or self.rule_engine.has_field_cues(text)
+        return loan_type, score, relevant
+
+    def segment(self, pages):
+        """Group (page_number, text) pairs, in page order, into Segments."""
+        segments = []
+        current = None
+        for page, text in pages:
+            loan_type, score, relevant = self.classify_page(text)
+            if current is not None and current.accepts(page, loan_type, relevant):
+                current.add_page(page, text, loan_type, score)
+                continue
+            current = Segment(page, text, loan_type, score if loan_type else 0.0, relevant)
+            segments.append(current)
+
+        relevant_pages = sum(segment.page_count for segment in segments if segment.relevant)
+        logger.info("Segmented %d pages into %d segments, %d relevant pages",
+                    len(pages), len(segments), relevant_pages)
+        return segments
+
+    @staticmethod
+    def whole_document(pages):
+        """A single relevant segment covering every page (segmentation off, or nothing looked relevant)."""
+        first, text = pages[0]
+        segment = Segment(first, text, None, 0.0, True)
+        for page, text in pages[1:]:
+            segment.last_page = page
+            segment.texts.append(text)
+        return segment
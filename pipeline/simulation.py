@@ -0,0 +1,142 @@
+import logging
+import math
+import random
+import threading
+import time
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedThrottle(Exception):
+    """Raised by a simulator when the simulated service rejects a call for rate."""
+
+
+class SimulatedFailure(Exception):
+    """Raised by a simulator for a transient service-side failure."""
+
+
+class LatencySimulator:
+    """Injects realistic latency, throttling and transient failures into mock backends.
+
+    Latency is base_ms + per_unit_ms * units, scaled by log-normal jitter
+    (median 1.0, shape `sigma`). A token bucket enforces `tps_limit` like a
+    service quota, so concurrent callers see throttling under load.
+    """
+
+    def __init__(self, name, base_ms, per_unit_ms, sigma=0.4, tps_limit=0.0,
+                 throttle_rate=0.0, failure_rate=0.0, time_scale=1.0, seed=None,
+                 max_attempts=1, backoff_base_ms=100.0, backoff_max_ms=2000.0):
+        self.name = name
+        self.base_ms = base_ms
+        self.per_unit_ms = per_unit_ms
+        self.sigma = sigma
+        self.tps_limit = tps_limit
+        self.throttle_rate = throttle_rate
+        self.failure_rate = failure_rate
+        self.time_scale = time_scale
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_ms = backoff_base_ms
+        self.backoff_max_ms = backoff_max_ms
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._tokens = tps_limit
+        self._last_refill = time.monotonic()
+        self.calls = 0
+        self.throttled = 0
+        self.failed = 0
+        self.retried = 0
+
+    def sample_latency_ms(self, units):
+        with self._lock:
+            jitter = math.exp(self._rng.gauss(0.0, self.sigma))
+        return (self.base_ms + self.per_unit_ms * units) * jitter
+
+    def _take_token(self):
+        """Token bucket refilled at tps_limit per second with a burst of tps_limit."""
+        if self.tps_limit <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            elapsed = (now - self._last_refill) / self.time_scale if self.time_scale > 0 else float("inf")
+            self._tokens = min(self.tps_limit, self._tokens + elapsed * self.tps_limit)
+            self._last_refill = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def _sleep(self, ms):
+        if self.time_scale > 0 and ms > 0:
+            time.sleep(ms * self.time_scale / 1000)
+
+    def call(self, units=1):
+        """Block for a simulated service call; raise SimulatedThrottle or SimulatedFailure."""
+        with self._lock:
+            self.calls += 1
+            throttle_roll = self._rng.random()
+            failure_roll = self._rng.random()
+
+        if not self._take_token() or throttle_roll < self.throttle_rate:
+            with self._lock:
+                self.throttled += 1
+            self._sleep(self.sample_latency_ms(0) * 0.1)
+            raise SimulatedThrottle(f"{self.name}: rate exceeded")
+
+        latency_ms = self.sample_latency_ms(units)
+        if failure_roll < self.failure_rate:
+            with self._lock:
+                self.failed += 1
+            # Transient failures surface part-way through the call.
+            self._sleep(latency_ms * self._rng.random())
+            raise SimulatedFailure(f"{self.name}: transient service error")
+
+        self._sleep(latency_ms)
+        return latency_ms
+
+    def call_with_retries(self, units=1):
+        """call(), retrying throttles and transient failures the way an SDK client would.
+
+        Up to `max_attempts` attempts, with capped exponential backoff and full
+        jitter between them; the last error is raised.
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                return self.call(units)
+            except (SimulatedThrottle, SimulatedFailure) as e:
+                if attempt == self.max_attempts:
+                    raise
+                with self._lock:
+                    self.retried += 1
+                    backoff_ms = self._rng.uniform(0, min(self.backoff_max_ms, self.backoff_base_ms * 2 ** (attempt - 1)))
+                logger.debug("%s attempt %d failed (%s), retrying in %.0fms", self.name, attempt, e, backoff_ms)
+                self._sleep(backoff_ms)
+
+    def stats(self):
+        return {"calls": self.calls, "throttled": self.throttled, "failed": self.failed, "retried": self.retried}
+
+
+def textract_simulator():
+    """Simulator for MockTextract, or None when SIMULATE_BACKENDS is off (units = pages)."""
+    sim = settings.simulation
+    if not sim.enabled:
+        return None
+    return LatencySimulator("textract", sim.textract_base_ms, sim.textract_per_page_ms,
+                            sigma=sim.latency_sigma, tps_limit=sim.textract_tps_limit,
+                            throttle_rate=sim.textract_throttle_rate, failure_rate=sim.textract_failure_rate,
+                            time_scale=sim.time_scale, seed=f"{sim.seed}:textract",
+                            max_attempts=sim.max_attempts, backoff_base_ms=sim.backoff_base_ms,
+                            backoff_max_ms=sim.backoff_max_ms)
+
+
+def llm_simulator(provider):
+    """Simulator for a mock LLM provider, or None when SIMULATE_BACKENDS is off (units = 1k prompt tokens)."""
+    sim = settings.simulation
+    if not sim.enabled:
+        return None
+    return LatencySimulator(provider, sim.llm_base_ms, sim.llm_per_1k_tokens_ms,
+                            sigma=sim.latency_sigma, tps_limit=sim.llm_tps_limit,
+                            throttle_rate=sim.llm_throttle_rate, failure_rate=sim.llm_failure_rate,
+                            time_scale=sim.time_scale, seed=f"{sim.seed}:{provider}",
+                            max_attempts=sim.max_attempts, backoff_base_ms=sim.backoff_base_ms,
+                            backoff_max_ms=sim.backoff_max_ms)
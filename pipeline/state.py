@@ -0,0 +1,86 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class FieldResult:
+    """One extracted field. Supports the read-only dict access (`r["value"]`, `r.get(...)`) older callers use."""
+
+    value: Optional[str] = None
+    confidence: float = 0.0
+    method: str = ""
+    source: Optional[str] = None
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def to_dict(self):
+        """Plain dict in the shape the API and DynamoDB have always used."""
+        result = {"value": self.value, "confidence": self.confidence, "method": self.method}
+        if self.source is not None:
+            result["source"] = self.source
+        return result
+
+
+@dataclass(slots=True)
+class PipelineState:
+    """Typed state passed between agent steps.
+
+    Each attribute is owned by the step that sets it. Large intermediates
+    (page text, form fields, per-method results) are released with `release()`
+    once no later step reads them, so a finished run keeps only the
+    decision, the final fields and the monitoring summary. Item access
+    (`state["status"]`) keeps code written against the old dict working.
+    """
+
+    document_id: str
+    status: str = "started"
+    pages: Optional[List[Tuple[int, str]]] = None
+    clean_text: Optional[str] = None
+    forms: Any = None
+    content_hash: Optional[str] = None
+    signature: Any = None
+    duplicate_of: Optional[str] = None
+    segments: Optional[List[Any]] = None
+    rule_result: Optional[Dict[str, Any]] = None
+    llm_result: Optional[Dict[str, Any]] = None
+    final_result: Optional[Dict[str, Any]] = None
+    guardrails: Optional[Dict[str, Any]] = None
+    validation: Optional[Dict[str, Any]] = None
+    monitoring: Optional[Dict[str, Any]] = None
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(f"PipelineState has no field {key!r}")
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__ and getattr(self, key) is not None
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.__slots__ else None
+        return default if value is None else value
+
+    def release(self, *names):
+        """Drop intermediates no later step needs."""
+        for name in names:
+            setattr(self, name, None)
+
+    def segment_summaries(self):
+        """Pages, loan type and (for extracted segments) fields of each segment, as plain dicts."""
+        return [segment.to_dict() for segment in self.segments or ()]
+
+    def final_fields(self):
+        """Final result as plain dicts, for JSON responses and storage."""
+        return {name: result.to_dict() if isinstance(result, FieldResult) else result
+                for name, result in (self.final_result or {}).items()}
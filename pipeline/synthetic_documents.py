@@ -0,0 +1,331 @@
+import logging
+import random
+import re
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = ["John", "Maria", "David", "Aisha", "Wei", "Carlos", "Emily", "Rahul", "Sofia", "James"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Johnson", "Nguyen", "Brown", "Okafor", "Miller", "Rossi"]
+
+LOAN_PROFILES = {
+    "personal_loan": {
+        "title": "PERSONAL LOAN AGREEMENT",
+        "keywords": ["This personal loan is unsecured.", "The APR is disclosed below.",
+                     "The borrower will make a monthly payment on the due date."],
+        "amount": (2000, 50000), "rate": (5.0, 24.0), "terms": [24, 36, 48, 60]
+    },
+    "auto_loan": {
+        "title": "AUTO LOAN AGREEMENT",
+        "keywords": ["Vehicle: 2022 Toyota Camry", "VIN: 4T1BF1FK5CU123456",
+                     "Dealer: Metro Auto Sales", "Mileage at purchase: 12,400"],
+        "amount": (8000, 75000), "rate": (3.0, 15.0), "terms": [36, 48, 60, 72]
+    },
+    "commercial_loan": {
+        "title": "COMMERCIAL LOAN AGREEMENT",
+        "keywords": ["Business borrower commercial credit facility.", "Minimum DSCR covenant: 1.25x",
+                     "Maximum LTV: 75%", "Collateral: business equipment and receivables"],
+        "amount": (100000, 5000000), "rate": (6.0, 12.0), "terms": [60, 84, 120]
+    },
+    "heloc": {
+        "title": "HOME EQUITY LINE OF CREDIT AGREEMENT",
+        "keywords": ["HELOC credit limit secured by home equity.", "Draw period: 10 years",
+                     "Combined CLTV may not exceed 85%"],
+        "amount": (25000, 500000), "rate": (7.0, 11.0), "terms": [120, 240, 360]
+    },
+    "sba_loan": {
+        "title": "SBA 7(a) LOAN AUTHORIZATION",
+        "keywords": ["SBA guarantee of 75% applies.", "Small business borrower certification.",
+                     "Use of proceeds: working capital"],
+        "amount": (50000, 5000000), "rate": (8.0, 13.0), "terms": [84, 120, 300]
+    }
+}
+
+BOILERPLATE = [
+    "The borrower agrees to repay the principal amount plus interest over the specified term period.",
+    "Payments received after the due date may be subject to a late charge as permitted by law.",
+    "The lender may assign this agreement without notice to the borrower.",
+    "Any waiver of a default shall not constitute a waiver of any other default.",
+    "This agreement is governed by the laws of the state in which the lender is located.",
+    "The borrower may prepay all or part of the balance at any time without penalty.",
+    "Notices must be delivered in writing to the addresses listed in this agreement.",
+    "If any provision is held invalid the remaining provisions remain in full force.",
+    "The borrower represents that all information provided in the application is true.",
+    "Insurance required by this agreement may be obtained from any insurer acceptable to the lender."
+]
+
+SCHEDULE_HEADER = ["Payment No", "Due Date", "Payment", "Principal", "Interest", "Balance"]
+
+# OCR confusions TextCleaner knows how to undo, plus whitespace and stray glyph noise.
+_NOISE_SUBSTITUTIONS = [("l", "|"), ("orrow", "0rrow"), ("$5", "$S")]
+_NOISE_GLYPHS = ["·", "•", "¦", "�"]
+
+_DOCUMENT_ID_PATTERN = re.compile(
+    r"^synthetic/(?P<loan_type>[a-z_]+)/p(?P<pages>\d+)-s(?P<seed>\d+)-n(?P<noise>[\d.]+)-t(?P<tables>[01])\.pdf$"
+)
+
+
+_PACKAGE_ID_PATTERN = re.compile(
+    r"^synthetic/package/s(?P<seed>\d+)-n(?P<noise>[\d.]+)/(?P<parts>[a-z_]+-\d+(?:\+[a-z_]+-\d+)*)\.pdf$"
+)
+
+# Package part made only of boilerplate pages and schedule tables
+DISCLOSURE = "disclosure"
+
+
+def synthetic_document_id(loan_type="personal_loan", pages=1, seed=0, noise=0.0, tables=True):
+    """Build a document id that encodes the synthetic document parameters."""
+    return f"synthetic/{loan_type}/p{pages}-s{seed}-n{noise}-t{int(tables)}.pdf"
+
+
+class SyntheticLoanDocument:
+    """Generates Textract-style OCR output for a synthetic loan document."""
+
+    rows_per_page = 24
+
+    def __init__(self, loan_type="personal_loan", pages=1, seed=0, noise=0.0, tables=True):
+        if loan_type not in LOAN_PROFILES:
+            raise ValueError(f"Unknown loan type: {loan_type}")
+        if not 1 <= pages <= 1000:
+            raise ValueError(f"pages must be between 1 and 1000, got {pages}")
+        self.loan_type = loan_type
+        self.pages = pages
+        self.seed = seed
+        self.noise = noise
+        self.tables = tables
+        self.document_id = synthetic_document_id(loan_type, pages, seed, noise, tables)
+        self._rng = random.Random(f"{loan_type}:{pages}:{seed}:{noise}:{tables}")
+        self.fields = self._make_fields()
+        self._blocks = None
+
+    @classmethod
+    def from_document_id(cls, document_id):
+        """Rebuild a document from a synthetic document id, or None if the id is not synthetic."""
+        match = _DOCUMENT_ID_PATTERN.match(document_id)
+        if not match:
+            return None
+        return cls(
+            loan_type=match["loan_type"],
+            pages=int(match["pages"]),
+            seed=int(match["seed"]),
+            noise=float(match["noise"]),
+            tables=match["tables"] == "1"
+        )
+
+    def _make_fields(self):
+        profile = LOAN_PROFILES[self.loan_type]
+        amount = self._rng.randrange(profile["amount"][0], profile["amount"][1], 500)
+        rate = round(self._rng.uniform(*profile["rate"]), 2)
+        term = self._rng.choice(profile["terms"])
+        monthly_rate = rate / 100 / 12
+        payment = amount * monthly_rate / (1 - (1 + monthly_rate) ** -term)
+        return {
+            "borrower_name": f"{self._rng.choice(FIRST_NAMES)} {self._rng.choice(LAST_NAMES)}",
+            "loan_amount": str(amount),
+            "interest_rate": f"{rate:.2f}",
+            "loan_term": str(term),
+            "monthly_payment": f"{payment:.2f}",
+            "loan_type": self.loan_type
+        }
+
+    def _noisy(self, text):
+        """Apply OCR-style corruption to a line with probability `noise`."""
+        if self.noise <= 0 or self._rng.random() >= self.noise:
+            return text
+        for original, corrupted in _NOISE_SUBSTITUTIONS:
+            if original in text and self._rng.random() < 0.5:
+                text = text.replace(original, corrupted, 1)
+        if self._rng.random() < 0.5:
+            position = self._rng.randrange(len(text) + 1)
+            text = text[:position] + self._rng.choice(_NOISE_GLYPHS) + text[position:]
+        if self._rng.random() < 0.3:
+            text = text.replace(" ", "   ", 1)
+        return text
+
+    def _schedule_rows(self):
+        """Amortization schedule rows for the whole term."""
+        balance = float(self.fields["loan_amount"])
+        monthly_rate = float(self.fields["interest_rate"]) / 100 / 12
+        payment = float(self.fields["monthly_payment"])
+        for number in range(1, int(self.fields["loan_term"]) + 1):
+            interest = balance * monthly_rate
+            principal = payment - interest
+            balance = max(balance - principal, 0.0)
+            year, month = divmod(number - 1, 12)
+            yield [str(number), f"{month + 1:02d}/{2027 + year}", f"${payment:,.2f}",
+                   f"${principal:,.2f}", f"${interest:,.2f}", f"${balance:,.2f}"]
+
+    def _page_lines(self, page):
+        profile = LOAN_PROFILES[self.loan_type]
+        if page == 1:
+            fields = self.fields
+            lines = [
+                profile["title"],
+                f"Borrower: {fields['borrower_name']}",
+                f"Loan Amount: ${int(fields['loan_amount']):,}",
+                f"Interest Rate: {fields['interest_rate']}%",
+                f"Term: {fields['loan_term']} months",
+                f"Monthly Payment: ${float(fields['monthly_payment']):,.2f}"
+            ]
+            return lines + profile["keywords"]
+        count = self._rng.randint(8, 14)
+        return [self._rng.choice(BOILERPLATE) for _ in range(count)]
+
+    def blocks(self):
+        """Textract AnalyzeDocument blocks (PAGE, LINE, WORD, KEY_VALUE_SET, TABLE, CELL) for every page."""
+        if self._blocks is not None:
+            return self._blocks
+
+        blocks = []
+        counter = iter(range(1, 10 ** 9))
+
+        def new_id(prefix):
+            return f"{prefix}-{next(counter)}"
+
+        def add_words(text, page):
+            ids = []
+            for word in text.split():
+                word_id = new_id("word")
+                blocks.append({'BlockType': 'WORD', 'Id': word_id, 'Text': word, 'Page': page})
+                ids.append(word_id)
+            return ids
+
+        def add_line(text, page):
+            line_id = new_id("line")
+            line = {'BlockType': 'LINE', 'Id': line_id, 'Text': text, 'Page': page}
+            blocks.append(line)
+            word_ids = add_words(text, page)
+            line['Relationships'] = [{'Type': 'CHILD', 'Ids': word_ids}]
+            if page == 1 and ':' in text:
+                add_form_field(text, word_ids, page)
+            return line_id
+
+        def add_form_field(text, word_ids, page):
+            """KEY/VALUE pair sharing the line's WORD blocks, as Textract FORMS returns."""
+            key_words = len(text.split(':', 1)[0].split())
+            key_word_ids, value_word_ids = word_ids[:max(key_words, 1)], word_ids[max(key_words, 1):]
+            if not value_word_ids:
+                return
+            key_id, value_id = new_id("key"), new_id("value")
+            blocks.append({'BlockType': 'KEY_VALUE_SET', 'Id': key_id, 'EntityTypes': ['KEY'], 'Page': page,
+                           'Relationships': [{'Type': 'VALUE', 'Ids': [value_id]},
+                                             {'Type': 'CHILD', 'Ids': key_word_ids}]})
+            blocks.append({'BlockType': 'KEY_VALUE_SET', 'Id': value_id, 'EntityTypes': ['VALUE'], 'Page': page,
+                           'Relationships': [{'Type': 'CHILD', 'Ids': value_word_ids}]})
+
+        schedule = self._schedule_rows() if self.tables else iter(())
+        for page in range(1, self.pages + 1):
+            page_block = {'BlockType': 'PAGE', 'Id': new_id("page"), 'Text': '', 'Page': page}
+            blocks.append(page_block)
+            child_ids = []
+
+            for text in self._page_lines(page):
+                child_ids.append(add_line(self._noisy(text), page))
+
+            rows = [row for _, row in zip(range(self.rows_per_page), schedule)] if page > 1 else []
+            if rows:
+                child_ids.append(self._add_table(blocks, new_id, add_words, add_line, page, rows))
+
+            page_block['Relationships'] = [{'Type': 'CHILD', 'Ids': child_ids}]
+
+        self._blocks = blocks
+        logger.debug("Generated %d blocks for %s", len(blocks), self.document_id)
+        return blocks
+
+    def _add_table(self, blocks, new_id, add_words, add_line, page, rows):
+        """Add a TABLE block with a repeated header row, its CELLs and the matching LINEs."""
+        table_id = new_id("table")
+        table = {'BlockType': 'TABLE', 'Id': table_id, 'Page': page}
+        blocks.append(table)
+        cell_ids = []
+        for row_index, row in enumerate([SCHEDULE_HEADER] + rows, start=1):
+            add_line(self._noisy(" ".join(row)), page)
+            for column_index, value in enumerate(row, start=1):
+                cell_id = new_id("cell")
+                blocks.append({
+                    'BlockType': 'CELL', 'Id': cell_id, 'Page': page,
+                    'RowIndex': row_index, 'ColumnIndex': column_index,
+                    'Relationships': [{'Type': 'CHILD', 'Ids': add_words(value, page)}]
+                })
+                cell_ids.append(cell_id)
+        table['Relationships'] = [{'Type': 'CHILD', 'Ids': cell_ids}]
+        return table_id
+
+    def text(self):
+        """Raw OCR text the pipeline would read from the LINE blocks."""
+        return ' '.join(block['Text'] for block in self.blocks() if block['BlockType'] == 'LINE')
+
+    def to_response(self):
+        """Textract-shaped response for this document."""
+        return {'DocumentMetadata': {'Pages': self.pages}, 'Blocks': self.blocks()}
+
+
+class SyntheticLoanPackage:
+    """Several synthetic documents bundled into one PDF, e.g. a note, a disclosure and an SBA form.
+
+    `parts` is a list of (kind, pages); kind is a loan type, or "disclosure" for
+    pages with no loan terms (the continuation pages of a document, without its cover page).
+    """
+
+    def __init__(self, parts, seed=0, noise=0.0):
+        if not parts:
+            raise ValueError("A package needs at least one part")
+        self.parts = [(kind, int(pages)) for kind, pages in parts]
+        self.seed = seed
+        self.noise = noise
+        self.pages = sum(pages for _, pages in self.parts)
+        if not 1 <= self.pages <= 1000:
+            raise ValueError(f"pages must be between 1 and 1000, got {self.pages}")
+        spec = "+".join(f"{kind}-{pages}" for kind, pages in self.parts)
+        self.document_id = f"synthetic/package/s{seed}-n{noise}/{spec}.pdf"
+        self._documents = []
+        for position, (kind, pages) in enumerate(self.parts):
+            if kind == DISCLOSURE:
+                # Pages 2.. of a document: boilerplate and schedules only
+                document = SyntheticLoanDocument("personal_loan", pages + 1, seed + position, noise)
+            else:
+                document = SyntheticLoanDocument(kind, pages, seed + position, noise)
+            self._documents.append((kind, document))
+        self.fields = [document.fields for kind, document in self._documents if kind != DISCLOSURE]
+        self._blocks = None
+
+    @classmethod
+    def from_document_id(cls, document_id):
+        match = _PACKAGE_ID_PATTERN.match(document_id)
+        if not match:
+            return None
+        parts = [part.rsplit("-", 1) for part in match["parts"].split("+")]
+        return cls(parts, seed=int(match["seed"]), noise=float(match["noise"]))
+
+    def blocks(self):
+        """Blocks of every part, renumbered onto consecutive pages with unique ids."""
+        if self._blocks is not None:
+            return self._blocks
+        blocks = []
+        offset = 0
+        for position, (kind, document) in enumerate(self._documents):
+            skip = 1 if kind == DISCLOSURE else 0
+            for block in document.blocks():
+                if block['Page'] <= skip:
+                    continue
+                copy = dict(block, Id=f"{position}-{block['Id']}", Page=block['Page'] - skip + offset)
+                if 'Relationships' in block:
+                    copy['Relationships'] = [
+                        {'Type': relationship['Type'], 'Ids': [f"{position}-{i}" for i in relationship['Ids']]}
+                        for relationship in block['Relationships']
+                    ]
+                blocks.append(copy)
+            offset += document.pages - skip
+        self._blocks = blocks
+        logger.debug("Generated %d blocks for %s", len(blocks), self.document_id)
+        return blocks
+
+    def text(self):
+        return ' '.join(block['Text'] for block in self.blocks() if block['BlockType'] == 'LINE')
+
+    def to_response(self):
+        return {'DocumentMetadata': {'Pages': self.pages}, 'Blocks': self.blocks()}
+
+
+def synthetic_from_document_id(document_id):
+    """SyntheticLoanDocument or SyntheticLoanPackage for a synthetic id, else None."""
+    return SyntheticLoanDocument.from_document_id(document_id) or SyntheticLoanPackage.from_document_id(document_id)
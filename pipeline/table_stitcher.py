@@ -1,45 +1,201 @@
 import logging
+import re
 from typing import List, Dict
 
 logger = logging.getLogger(__name__)
 
+_NUMERIC_CELL = re.compile(r'\d')
+
+
+def index_blocks(blocks):
+    """Id → block index so relationships resolve in O(1)."""
+    return {block['Id']: block for block in blocks}
+
+
+def related_ids(block, relationship_type='CHILD'):
+    """Ids a block points to through one relationship type."""
+    ids = []
+    for relationship in block.get('Relationships', ()):
+        if relationship['Type'] == relationship_type:
+            ids.extend(relationship['Ids'])
+    return ids
+
+
+def block_text(block, index):
+    """Text of a CELL/KEY/VALUE block from its WORD children."""
+    words = (index.get(child_id) for child_id in related_ids(block))
+    return ' '.join(word['Text'] for word in words if word is not None and word['BlockType'] == 'WORD')
+
+
+def header_signature(header):
+    """Case-insensitive signature of a header row, in column order.
+
+    Rows are appended by position, so only a header with the same names in the
+    same order (and so the same width) continues a table.
+    """
+    return tuple(str(name).strip().lower() for name in header)
+
+
+def unique_column_names(header):
+    """Column keys for a header row: blank cells become column_<position> and repeats get a _2, _3... suffix.
+
+    Textract tables often have blank or repeated header cells, which would
+    otherwise share one column of data.
+    """
+    names = []
+    seen = set()
+    for position, name in enumerate(header, 1):
+        base = name if str(name).strip() else f"column_{position}"
+        unique, suffix = base, 2
+        while unique in seen:
+            unique, suffix = f"{base}_{suffix}", suffix + 1
+        seen.add(unique)
+        names.append(unique)
+    return names
+
+
+class StitchedTable:
+    """A table merged across pages, stored column-wise for cheap scans."""
+
+    __slots__ = ("columns", "data", "pages", "signature")
+
+    def __init__(self, columns, page):
+        columns = list(columns)
+        # Continuation pages repeat the header as printed, so match on that rather than the unique names
+        self.signature = header_signature(columns)
+        self.columns = unique_column_names(columns)
+        self.data = {column: [] for column in self.columns}
+        self.pages = [page]
+
+    @property
+    def row_count(self):
+        return len(self.data[self.columns[0]]) if self.columns else 0
+
+    def append_rows(self, rows, page=None):
+        """Append rows (lists of cell values in column order) in place."""
+        for position, column in enumerate(self.columns):
+            self.data[column].extend(row[position] if position < len(row) else '' for row in rows)
+        if page is not None and page != self.pages[-1]:
+            self.pages.append(page)
+
+    def column(self, name):
+        return self.data[name]
+
+    def rows(self):
+        """Row dicts, for callers that still expect the row-oriented form."""
+        return [dict(zip(self.columns, values)) for values in zip(*(self.data[c] for c in self.columns))]
+
+    def to_dict(self):
+        return {"columns": self.columns, "data": self.data, "pages": self.pages, "row_count": self.row_count}
+
 
 class TableStitcher:
     """Fixes tables split across multiple pages (LOAN-BUG-001)."""
 
     def __init__(self):
         self.merge_count = 0
+        self._tables = []
+        self._current = None
 
     def columns_match(self, table1, table2):
         """Check if two tables have the same column headers."""
         if not table1 or not table2:
             return False
-        headers1 = table1[0].keys()
-        headers2 = table2[0].keys()
-        return set(headers1) == set(headers2)
+        return set(table1[0].keys()) == set(table2[0].keys())
 
     def stitch_tables(self, tables_by_page):
-        """Merge tables that span across pages."""
+        """Merge row-dict tables that span across pages; rows are keyed by name, so column order doesn't matter."""
         if not tables_by_page:
             return []
-        
+
         merged_tables = []
         current_table = None
+        current_signature = None
 
         for page_num, tables in tables_by_page.items():
             for table in tables:
+                signature = frozenset(table[0].keys()) if table else None
                 if current_table is None:
-                    current_table = table
-                elif self.columns_match(current_table, table):
-                    current_table = current_table + table
+                    current_table, current_signature = list(table), signature
+                elif signature is not None and signature == current_signature:
+                    current_table.extend(table)
                     self.merge_count += 1
-                    logger.info(f"Merged table from page {page_num}")
+                    logger.debug("Merged table from page %s", page_num)
                 else:
                     merged_tables.append(current_table)
-                    current_table = table
+                    current_table, current_signature = list(table), signature
 
         if current_table:
             merged_tables.append(current_table)
 
-        logger.info(f"Stitching complete: {self.merge_count} merges, {len(merged_tables)} final tables")
-        return merged_tables
\ No newline at end of file
+        logger.debug("Stitching complete: %d merges, %d final tables", self.merge_count, len(merged_tables))
+        return merged_tables
+
+    def parse_tables(self, blocks, index=None):
+        """Yield (page, header, rows) for each Textract TABLE block; header is None if the table has none."""
+        if index is None:
+            index = index_blocks(blocks)
+        for block in blocks:
+            if block['BlockType'] != 'TABLE':
+                continue
+            grid = {}
+            header_rows = set()
+            for cell_id in related_ids(block):
+                cell = index.get(cell_id)
+                if cell is None or cell['BlockType'] != 'CELL':
+                    continue
+                grid.setdefault(cell['RowIndex'], {})[cell['ColumnIndex']] = block_text(cell, index)
+                if 'COLUMN_HEADER' in cell.get('EntityTypes', ()):
+                    header_rows.add(cell['RowIndex'])
+            if not grid:
+                continue
+            width = max(max(row) for row in grid.values())
+            rows = [[grid[r].get(c, '') for c in range(1, width + 1)] for r in sorted(grid)]
+            first = rows[0]
+            is_header = min(grid) in header_rows or not any(_NUMERIC_CELL.search(value) for value in first)
+            if is_header:
+                yield block.get('Page', 1), first, rows[1:]
+            else:
+                yield block.get('Page', 1), None, rows
+
+    def add_table(self, page, header, rows):
+        """Feed one table as pages arrive; merges into the open table in O(rows)."""
+        current = self._current
+        if current is not None:
+            same_header = header is not None and header_signature(header) == current.signature
+            # Headerless continuation on the next page with the same width
+            continuation = (header is None and page == current.pages[-1] + 1
+                            and rows and len(rows[0]) == len(current.columns))
+            if same_header or continuation:
+                current.append_rows(rows, page)
+                self.merge_count += 1
+                logger.debug("Merged table from page %s", page)
+                return current
+            self._tables.append(current)
+
+        if header is None:
+            header = [f"column_{position}" for position in range(1, len(rows[0]) + 1)] if rows else []
+        self._current = StitchedTable(header, page)
+        self._current.append_rows(rows)
+        return self._current
+
+    def add_blocks(self, blocks, index=None):
+        """Parse and stitch the TABLE blocks of one Textract response (or chunk of pages)."""
+        if index is None:
+            index = index_blocks(blocks)
+        for page, header, rows in self.parse_tables(blocks, index):
+            self.add_table(page, header, rows)
+
+    def finish(self) -> List[StitchedTable]:
+        """Close the open table and return every stitched table."""
+        if self._current is not None:
+            self._tables.append(self._current)
+            self._current = None
+        tables, self._tables = self._tables, []
+        logger.debug("Stitching complete: %d merges, %d final tables", self.merge_count, len(tables))
+        return tables
+
+    def stitch_blocks(self, blocks) -> List[StitchedTable]:
+        """Stitch all tables in a complete Textract block list."""
+        self.add_blocks(blocks)
+        return self.finish()
@@ -9,6 +9,12 @@ class TextCleaner:
 
     def clean(self, raw_text):
         """Clean messy OCR text."""
+        text = self.clean_value(raw_text)
+        logger.debug("Cleaned text: %d chars → %d chars", len(raw_text), len(text))
+        return text
+
+    def clean_value(self, raw_text):
+        """Apply the cleaning rules to a short string (e.g. a form value) without logging."""
         text = raw_text
 
         # Remove extra whitespace
@@ -25,6 +31,4 @@ class TextCleaner:
         # Normalize common patterns
         text = re.sub(r'(\d),(\d{3})', r'\1,\2', text)  # fix broken numbers like 25, 000
 
-        text = text.strip()
-        logger.info(f"Cleaned text: {len(raw_text)} chars → {len(text)} chars")
-        return text
\ No newline at end of file
+        return text.strip()
\ No newline at end of file
@@ -1,8 +1,9 @@
 import os
-import boto3
 import logging
 from config.settings import Settings
+from pipeline import aws_clients
 from pipeline.mock_textract import MockTextract
+from pipeline.monitoring import span
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +17,7 @@ class TextractClient:
             self.client = MockTextract()
             logger.info("Using MockTextract for local development")
         else:
-            self.client = boto3.client('textract', region_name=self.settings.aws.region)
+            self.client = aws_clients.client('textract')
             logger.info("Using real AWS Textract")
 
     def process_document(self, document_id, s3_bucket=None, page_count=1):
@@ -24,13 +25,13 @@ class TextractClient:
         if s3_bucket is None:
             s3_bucket = self.settings.aws.s3_bucket
 
-        logger.info(f"Processing document: {document_id} from bucket: {s3_bucket}")
+        logger.info("Processing document: %s from bucket: %s", document_id, s3_bucket)
 
         if self.needs_chunking(page_count):
             chunks = self.chunk_pages(page_count)
             results = []
             for chunk in chunks:
-                logger.info(f"Processing chunk: pages {chunk[0]} to {chunk[1]}")
+                logger.debug("Processing chunk: pages %d to %d", chunk[0], chunk[1])
                 response = self.call_textract(document_id, s3_bucket)
                 results.append(response)
             return results
@@ -40,28 +41,29 @@ class TextractClient:
     def call_textract(self, document_id, s3_bucket):
         """Send document to Textract and get results."""
         try:
-            response = self.client.analyze_document(
-                Document={
-                    'S3Object': {
-                        'Bucket': s3_bucket,
-                        'Name': document_id
-                    }
-                },
-                FeatureTypes=['TABLES', 'FORMS']
-            )
-            logger.info(f"Textract returned {len(response['Blocks'])} blocks")
+            with span("Textract Call", document_id=document_id):
+                response = self.client.analyze_document(
+                    Document={
+                        'S3Object': {
+                            'Bucket': s3_bucket,
+                            'Name': document_id
+                        }
+                    },
+                    FeatureTypes=['TABLES', 'FORMS']
+                )
+            logger.debug("Textract returned %d blocks", len(response['Blocks']))
             return response
         except Exception as e:
-            logger.error(f"Textract failed for {document_id}: {e}")
+            logger.error("Textract failed for %s: %s", document_id, e)
             raise
 
     def needs_chunking(self, page_count):
         """Check if document needs to be split into chunks."""
         max_pages = self.settings.textract.max_pages
         if page_count > max_pages:
-            logger.info(f"Document has {page_count} pages, exceeds {max_pages}. Chunking needed.")
+            logger.info("Document has %d pages, exceeds %d. Chunking needed.", page_count, max_pages)
             return True
-        logger.info(f"Document has {page_count} pages, no chunking needed.")
+        logger.debug("Document has %d pages, no chunking needed.", page_count)
         return False
 
     def chunk_pages(self, total_pages):
@@ -71,5 +73,5 @@ class TextractClient:
         for start in range(0, total_pages, chunk_size):
             end = min(start + chunk_size, total_pages)
             chunks.append((start + 1, end))
-        logger.info(f"Split {total_pages} pages into {len(chunks)} chunks: {chunks}")
+        logger.debug("Split %d pages into %d chunks: %s", total_pages, len(chunks), chunks)
         return chunks
\ No newline at end of file
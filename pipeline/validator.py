@@ -1,14 +1,118 @@
 import logging
+import math
+import re
+import numpy as np
 from config.settings import Settings
 
 logger = logging.getLogger(__name__)
 
+# (field, ValidationConfig limit) - every range rule is "value must not exceed the limit"
+RANGE_RULES = (
+    ("loan_amount", "max_loan_amount"),
+    ("interest_rate", "max_interest_rate"),
+    ("loan_term", "max_loan_term_months"),
+)
+
+# What is left of a value once "$", thousands separators and a trailing "%" are removed
+_NUMBER = re.compile(r"([-+]?(?:\d+\.?\d*|\.\d+))\s*(?:percent|months?|mos?\.?)?", re.IGNORECASE)
+
+
+def _strip_number(text):
+    return text.replace(",", "").replace("$", "").strip().rstrip("%").strip()
+
+
+def parse_number(value):
+    """Float from an extracted value such as "$25,000.00", "5.99%" or "60 months".
+
+    Returns NaN for a missing value and None for one that is not a number.
+    """
+    if value is None or value == "":
+        return math.nan
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _NUMBER.fullmatch(_strip_number(str(value)))
+    return float(match.group(1)) if match else None
+
+
+_parse_object = np.frompyfunc(parse_number, 1, 1)
+
+
+def parse_column(values):
+    """Vectorized parse_number over a column: (float64 values, unparseable mask).
+
+    Missing and unparseable entries are NaN in `values`. Plain decimals are
+    converted with numpy string ufuncs; only the rest go through the regex.
+    """
+    raw = np.asarray(values, dtype=object)
+    numbers = np.full(len(raw), np.nan)
+    unparseable = np.zeros(len(raw), dtype=bool)
+    present = np.array([value is not None and value != "" for value in raw.tolist()], dtype=bool)
+    if not present.any():
+        return numbers, unparseable
+
+    text = np.asarray(raw[present], dtype=np.dtypes.StringDType())
+    text = np.strings.replace(np.strings.replace(text, ",", ""), "$", "")
+    text = np.strings.strip(np.strings.rstrip(np.strings.strip(text), "%"))
+    plain = np.strings.isdecimal(np.strings.replace(text, ".", "", 1))
+
+    parsed = np.full(len(text), np.nan)
+    try:
+        parsed[plain] = text[plain].astype(np.float64)
+    except ValueError:
+        plain[:] = False
+    if not plain.all():
+        rest = _parse_object(raw[present][~plain])
+        bad = np.array([value is None for value in rest.tolist()], dtype=bool)
+        rest[bad] = np.nan
+        parsed[~plain] = rest.astype(np.float64)
+        unparseable_present = np.zeros(len(text), dtype=bool)
+        unparseable_present[~plain] = bad
+        unparseable[present] = unparseable_present
+
+    numbers[present] = parsed
+    return numbers, unparseable
+
+
+def field_columns(records, fields=None):
+    """Column of raw values per rule field from an iterable of `fields` dicts (as stored)."""
+    names = fields or [name for name, _ in RANGE_RULES]
+    columns = {name: [] for name in names}
+    for record in records:
+        for name in names:
+            result = record.get(name) if record else None
+            columns[name].append(result.get("value") if isinstance(result, dict) else result)
+    return columns
+
+
+class BatchValidation:
+    """Per-document outcome of validate_batch: error masks keyed by error code, plus `valid`."""
+
+    __slots__ = ("errors", "valid", "values")
+
+    def __init__(self, errors, valid, values):
+        self.errors = errors
+        self.valid = valid
+        self.values = values
+
+    def __len__(self):
+        return len(self.valid)
+
+    def error_codes(self, index):
+        """Error codes raised for one document."""
+        return [code for code, mask in self.errors.items() if mask[index]]
+
+    def counts(self):
+        return {code: int(mask.sum()) for code, mask in self.errors.items()}
+
 
 class Validator:
     """Validates extracted loan fields against business rules."""
 
-    def __init__(self):
+    def __init__(self, limits=None):
         self.settings = Settings()
+        self.limits = limits or self.settings.validation
 
     def validate(self, extracted_data):
         """Validate extracted fields against business rules."""
@@ -16,28 +120,64 @@ class Validator:
 
         amount = extracted_data.get("loan_amount", {}).get("value")
         if amount:
-            amount_num = float(amount.replace(",", ""))
-            if amount_num > self.settings.validation.max_loan_amount:
-                errors.append(f"Loan amount ${amount_num} exceeds max ${self.settings.validation.max_loan_amount}")
-                logger.error(f"Validation failed: loan amount too high")
+            amount_num = parse_number(amount)
+            if amount_num is None:
+                errors.append(f"Loan amount {amount!r} is not a number")
+            elif amount_num > self.limits.max_loan_amount:
+                errors.append(f"Loan amount ${amount_num} exceeds max ${self.limits.max_loan_amount}")
+                logger.error("Validation failed: loan amount too high")
 
         rate = extracted_data.get("interest_rate", {}).get("value")
         if rate:
-            rate_num = float(rate)
-            if rate_num > self.settings.validation.max_interest_rate:
-                errors.append(f"Interest rate {rate_num}% exceeds max {self.settings.validation.max_interest_rate}%")
-                logger.error(f"Validation failed: interest rate too high")
+            rate_num = parse_number(rate)
+            if rate_num is None:
+                errors.append(f"Interest rate {rate!r} is not a number")
+            elif rate_num > self.limits.max_interest_rate:
+                errors.append(f"Interest rate {rate_num}% exceeds max {self.limits.max_interest_rate}%")
+                logger.error("Validation failed: interest rate too high")
 
         term = extracted_data.get("loan_term", {}).get("value")
         if term:
-            term_num = int(term)
-            if term_num > self.settings.validation.max_loan_term_months:
-                errors.append(f"Loan term {term_num} months exceeds max {self.settings.validation.max_loan_term_months}")
-                logger.error(f"Validation failed: loan term too long")
+            term_num = parse_number(term)
+            if term_num is None:
+                errors.append(f"Loan term {term!r} is not a number")
+            elif term_num > self.limits.max_loan_term_months:
+                term_num = int(term_num) if term_num.is_integer() else term_num
+                errors.append(f"Loan term {term_num} months exceeds max {self.limits.max_loan_term_months}")
+                logger.error("Validation failed: loan term too long")
 
         if errors:
-            logger.warning(f"Validation found {len(errors)} errors")
+            logger.warning("Validation found %d errors", len(errors))
             return {"valid": False, "errors": errors}
 
         logger.info("Validation passed")
         return {"valid": True, "errors": []}
+
+    def validate_batch(self, columns):
+        """Apply every range rule to whole columns at once.
+
+        `columns` maps field name to a sequence of raw values, one per
+        document (see field_columns). Returns a BatchValidation whose error
+        masks are "<field>_exceeds_max" and "<field>_not_a_number"; missing
+        fields raise no error, matching validate().
+        """
+        errors = {}
+        values = {}
+        size = None
+        for name, limit in RANGE_RULES:
+            if name not in columns:
+                continue
+            numbers, unparseable = parse_column(columns[name])
+            size = len(numbers)
+            values[name] = numbers
+            with np.errstate(invalid="ignore"):
+                errors[f"{name}_exceeds_max"] = numbers > getattr(self.limits, limit)
+            errors[f"{name}_not_a_number"] = unparseable
+
+        if size is None:
+            size = len(next(iter(columns.values()), ()))
+        valid = np.ones(size, dtype=bool)
+        for mask in errors.values():
+            valid &= ~mask
+        logger.info("Batch validation: %d/%d valid", valid.sum(), size)
+        return BatchValidation(errors, valid, values)
@@ -0,0 +1,197 @@
+"""Re-run the validation rules over stored extraction results.
+
+Reads stored items from local JSON Lines files or from a DynamoDB export
+(DynamoDB JSON, optionally gzipped, e.g. the data/ folder of an S3 export).
+Both the compressed `fields_z` payload and the older plain `fields` JSON are
+understood. Items are validated in columnar batches with
+Validator.validate_batch, and the tool reports how many documents pass
+under the current ValidationConfig limits. Documents whose verdict differs
+from the stored `valid` flag are written to --changes. JSON decoding
+dominates, so files are spread over --workers processes (an export is split
+into many files).
+
+    python revalidate.py results.jsonl
+    python revalidate.py exports/AWSDynamoDB/01234-abcd/data --max-loan-amount 2000000 --changes changed.jsonl
+"""
+import argparse
+import dataclasses
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from config.settings import settings
+from pipeline.dynamodb_store import decompress_json
+from pipeline.validator import Validator, field_columns
+
+logger = logging.getLogger(__name__)
+
+EXTENSIONS = (".json", ".jsonl", ".json.gz", ".jsonl.gz")
+_TYPE_KEYS = {"S", "N", "BOOL", "NULL", "M", "L", "B", "SS", "NS", "BS"}
+
+
+def input_files(paths):
+    """Files to read: the paths themselves, or the export files under each directory."""
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, _, names in sorted(os.walk(path)):
+            for name in sorted(names):
+                if name.endswith(EXTENSIONS):
+                    yield os.path.join(root, name)
+
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _plain(attribute):
+    """Value of a DynamoDB JSON attribute ({"S": "..."}, {"BOOL": true}, ...); plain values pass through."""
+    if not isinstance(attribute, dict) or len(attribute) != 1:
+        return attribute
+    kind, value = next(iter(attribute.items()))
+    if kind not in _TYPE_KEYS:
+        return attribute
+    if kind == "NULL":
+        return None
+    if kind == "M":
+        return {key: _plain(item) for key, item in value.items()}
+    if kind == "L":
+        return [_plain(item) for item in value]
+    return value
+
+
+def read_items(paths):
+    """(document_id, processed_at, stored valid flag, fields dict) for every stored item."""
+    for path in input_files(paths):
+        with _open(path) as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                item = item.get("Item", item)
+                if "fields_z" in item:
+                    fields = decompress_json(_plain(item["fields_z"]))
+                else:
+                    fields = _plain(item.get("fields"))
+                    if isinstance(fields, str):
+                        fields = json.loads(fields)
+                yield (_plain(item.get("document_id")), _plain(item.get("processed_at")),
+                       _plain(item.get("valid")), fields or {})
+
+
+def _empty_totals():
+    return {"documents": 0, "valid": 0, "invalid": 0, "now_invalid": 0, "now_valid": 0, "errors": {}}
+
+
+def merge_totals(totals, other):
+    for key, value in other.items():
+        if key == "errors":
+            for code, count in value.items():
+                totals["errors"][code] = totals["errors"].get(code, 0) + count
+        else:
+            totals[key] += value
+    return totals
+
+
+def revalidate(items, validator, batch_size=100_000, changes=None):
+    """Validate items in columnar batches; write verdict changes to `changes` (a text file) if given."""
+    totals = _empty_totals()
+
+    def flush(keys, stored, records):
+        result = validator.validate_batch(field_columns(records))
+        stored = np.array([value is not False for value in stored], dtype=bool)
+        totals["documents"] += len(result)
+        totals["valid"] += int(result.valid.sum())
+        totals["invalid"] += int((~result.valid).sum())
+        totals["now_invalid"] += int((stored & ~result.valid).sum())
+        totals["now_valid"] += int((~stored & result.valid).sum())
+        for code, count in result.counts().items():
+            totals["errors"][code] = totals["errors"].get(code, 0) + count
+        if changes is not None:
+            for index in np.flatnonzero(stored != result.valid).tolist():
+                document_id, processed_at = keys[index]
+                changes.write(json.dumps({
+                    "document_id": document_id,
+                    "processed_at": processed_at,
+                    "valid": bool(result.valid[index]),
+                    "errors": result.error_codes(index)
+                }) + "\n")
+
+    keys, stored, records = [], [], []
+    for document_id, processed_at, valid, fields in items:
+        keys.append((document_id, processed_at))
+        stored.append(valid)
+        records.append(fields)
+        if len(keys) >= batch_size:
+            flush(keys, stored, records)
+            keys, stored, records = [], [], []
+    if keys:
+        flush(keys, stored, records)
+    return totals
+
+
+def _revalidate_file(path, limits, batch_size, keep_changes):
+    """Worker: totals and changed-verdict lines for one input file."""
+    logging.disable(logging.INFO)
+    changes = io.StringIO() if keep_changes else None
+    totals = revalidate(read_items([path]), Validator(limits), batch_size, changes)
+    return totals, changes.getvalue() if changes is not None else ""
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revalidate stored extraction results against the current limits")
+    parser.add_argument("paths", nargs="+", help="JSON Lines files, DynamoDB export files or export directories")
+    parser.add_argument("--max-loan-amount", type=float, help="override MAX_LOAN_AMOUNT")
+    parser.add_argument("--max-interest-rate", type=float, help="override MAX_INTEREST_RATE")
+    parser.add_argument("--max-loan-term-months", type=int, help="override MAX_LOAN_TERM_MONTHS")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="documents per columnar batch")
+    parser.add_argument("--changes", help="write documents whose verdict changed here (JSON Lines)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="processes, one input file each")
+    parser.add_argument("--log-level", default="WARNING")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    overrides = {name: getattr(args, name) for name in ("max_loan_amount", "max_interest_rate", "max_loan_term_months")
+                 if getattr(args, name) is not None}
+    limits = dataclasses.replace(settings.validation, **overrides)
+    files = list(input_files(args.paths))
+
+    started = time.perf_counter()
+    changes = open(args.changes, "w", encoding="utf-8") if args.changes else None
+    try:
+        if args.workers > 1 and len(files) > 1:
+            totals = _empty_totals()
+            with ProcessPoolExecutor(min(args.workers, len(files))) as pool:
+                runs = pool.map(_revalidate_file, files, [limits] * len(files),
+                                [args.batch_size] * len(files), [changes is not None] * len(files))
+                for file_totals, changed in runs:
+                    merge_totals(totals, file_totals)
+                    if changes is not None:
+                        changes.write(changed)
+        else:
+            totals = revalidate(read_items(files), Validator(limits), args.batch_size, changes)
+    finally:
+        if changes is not None:
+            changes.close()
+    elapsed = time.perf_counter() - started
+
+    totals["files"] = len(files)
+    totals["limits"] = dataclasses.asdict(limits)
+    totals["seconds"] = round(elapsed, 3)
+    totals["documents_per_minute"] = round(totals["documents"] / elapsed * 60) if elapsed else 0
+    print(json.dumps(totals, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
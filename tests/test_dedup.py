@@ -0,0 +1,107 @@
+import threading
+
+from pipeline.dedup import DuplicateIndex
+from pipeline.synthetic_documents import SyntheticLoanDocument
+
+
+def make_index(capacity=100):
+    return DuplicateIndex(num_perm=64, bands=16, threshold=0.8, capacity=capacity, shingle_size=5)
+
+
+def document_text(seed, loan_type="personal_loan"):
+    return SyntheticLoanDocument(loan_type, pages=2, seed=seed, tables=False).text()
+
+
+def add_text(index, document_id, text):
+    content_hash, signature = index.fingerprint(text)
+    index.add(document_id, content_hash, signature, {"document_id": document_id})
+
+
+def lookup_text(index, text):
+    return index.lookup(*index.fingerprint(text))
+
+
+def test_exact_duplicate():
+    index = make_index()
+    text = document_text(0)
+    add_text(index, "a.pdf", text)
+    match = lookup_text(index, text)
+    assert match.exact
+    assert match.document_id == "a.pdf"
+    assert match.fields == {"document_id": "a.pdf"}
+
+
+def test_near_duplicate_hit():
+    index = make_index()
+    text = document_text(0)
+    add_text(index, "a.pdf", text)
+    words = text.split()
+    words[len(words) // 2] = "rescanned"
+    match = lookup_text(index, " ".join(words))
+    assert match is not None
+    assert not match.exact
+    assert match.document_id == "a.pdf"
+    assert match.similarity >= 0.8
+
+
+def test_different_document_misses():
+    index = make_index()
+    add_text(index, "a.pdf", document_text(0))
+    assert lookup_text(index, "completely unrelated text about something else " * 20) is None
+    assert lookup_text(index, document_text(3, "commercial_loan")) is None
+
+
+def test_oldest_entry_is_evicted():
+    index = make_index(capacity=3)
+    texts = [f"document number {i} " + "shared filler words for every document " * 5 + f"unique tail {i} " * 30
+             for i in range(4)]
+    for i, text in enumerate(texts):
+        add_text(index, f"{i}.pdf", text)
+    assert len(index) == 3
+    assert lookup_text(index, texts[0]) is None
+    for i in (1, 2, 3):
+        assert lookup_text(index, texts[i]).document_id == f"{i}.pdf"
+
+
+def test_near_duplicate_found_after_background_merge():
+    index = make_index(capacity=5000)
+    texts = [" ".join(f"word{i}x{position}" for position in range(40)) for i in range(2000)]
+    for i, text in enumerate(texts):
+        add_text(index, f"{i}.pdf", text)
+    # Adds past the merge threshold are sorted on a background thread
+    for thread in threading.enumerate():
+        if thread.name == "dedup-merge":
+            thread.join()
+    match = lookup_text(index, texts[1234] + " rescanned")
+    assert not match.exact
+    assert match.document_id == "1234.pdf"
+
+
+def test_load_keeps_live_adds_newest():
+    index = make_index(capacity=4)
+    index.begin_load()
+    live = document_text(0)
+    add_text(index, "live.pdf", live)
+    # Held aside during the load, but still found
+    assert lookup_text(index, live).document_id == "live.pdf"
+
+    stored = [document_text(seed, "auto_loan") for seed in range(3)]
+    entries = []
+    for seed, text in enumerate(stored):
+        content_hash, signature = index.fingerprint(text)
+        entries.append((f"stored{seed}.pdf", content_hash, signature.tobytes(), {}))
+    assert index.load(entries) == 3
+    assert len(index) == 4
+
+    # The ring is full; the next add evicts the oldest stored entry, not the live one
+    add_text(index, "new.pdf", document_text(1, "heloc"))
+    assert lookup_text(index, live).document_id == "live.pdf"
+    assert lookup_text(index, stored[0]) is None
+    assert lookup_text(index, stored[1]).document_id == "stored1.pdf"
+
+
+def test_load_skips_wrong_length_signatures():
+    index = make_index()
+    content_hash, signature = index.fingerprint(document_text(0))
+    assert index.load([("a.pdf", content_hash, signature[:32].tobytes(), {})]) == 0
+    assert len(index) == 0
@@ -0,0 +1,67 @@
+from pipeline.synthetic_documents import SyntheticLoanDocument
+from pipeline.table_stitcher import TableStitcher, unique_column_names
+
+
+def stitch(*tables):
+    stitcher = TableStitcher()
+    for page, header, rows in tables:
+        stitcher.add_table(page, header, rows)
+    return stitcher.finish()
+
+
+def test_same_header_merges_across_pages():
+    tables = stitch((1, ["Date", "Payment"], [["2024-01", "100"]]),
+                    (2, [" date", "PAYMENT "], [["2024-02", "200"]]))
+    assert len(tables) == 1
+    assert tables[0].data == {"Date": ["2024-01", "2024-02"], "Payment": ["100", "200"]}
+    assert tables[0].pages == [1, 2]
+
+
+def test_reordered_header_does_not_swap_columns():
+    tables = stitch((1, ["Date", "Payment"], [["2024-01", "100"]]),
+                    (2, ["Payment", "Date"], [["200", "2024-02"]]))
+    assert len(tables) == 2
+    assert tables[0].column("Date") == ["2024-01"]
+    assert tables[1].column("Date") == ["2024-02"]
+
+
+def test_different_width_header_does_not_merge():
+    tables = stitch((1, ["Date", "Amount", "Amount"], [["2024-01", "1", "2"]]),
+                    (2, ["Date", "Amount"], [["2024-02", "3"]]))
+    assert len(tables) == 2
+    assert tables[0].columns == ["Date", "Amount", "Amount_2"]
+    assert tables[1].columns == ["Date", "Amount"]
+
+
+def test_headerless_continuation_on_next_page():
+    tables = stitch((1, ["Date", "Payment"], [["2024-01", "100"]]),
+                    (2, None, [["2024-02", "200"]]),
+                    (4, None, [["2024-04", "400"]]))
+    assert len(tables) == 2
+    assert tables[0].row_count == 2
+    assert tables[1].columns == ["column_1", "column_2"]
+
+
+def test_unique_column_names():
+    assert unique_column_names(["Date", "", "Amount", "Amount", " "]) == [
+        "Date", "column_2", "Amount", "Amount_2", "column_5"]
+
+
+def test_stitch_tables_matches_row_dict_keys():
+    stitcher = TableStitcher()
+    merged = stitcher.stitch_tables({
+        1: [[{"A": 1, "B": 2}]],
+        2: [[{"B": 3, "A": 4}]],
+        3: [[{"a": 5, "b": 6}]],
+    })
+    assert merged == [[{"A": 1, "B": 2}, {"B": 3, "A": 4}], [{"a": 5, "b": 6}]]
+    assert stitcher.merge_count == 1
+
+
+def test_stitch_blocks_merges_a_multi_page_schedule():
+    document = SyntheticLoanDocument("auto_loan", pages=4, seed=1)
+    tables = TableStitcher().stitch_blocks(document.blocks())
+    assert len(tables) == 1
+    assert tables[0].pages == [2, 3, 4]
+    assert tables[0].row_count == 60
+    assert tables[0].rows()[0]["Payment No"] == "1"
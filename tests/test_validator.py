@@ -0,0 +1,63 @@
+import math
+
+import numpy as np
+import pytest
+
+from pipeline.validator import Validator, field_columns, parse_column, parse_number
+
+RECORDS = [
+    {"loan_amount": {"value": "$25,000.00"}, "interest_rate": {"value": "5.99%"}, "loan_term": {"value": "60 months"}},
+    {"loan_amount": {"value": "75,000,000"}, "interest_rate": {"value": "4.5"}, "loan_term": {"value": "360"}},
+    {"loan_amount": {"value": "25000"}, "interest_rate": {"value": "36%"}, "loan_term": {"value": "481 months"}},
+    {"loan_amount": {"value": "twenty thousand"}, "interest_rate": {"value": "N/A"}, "loan_term": {"value": "  "}},
+    {"loan_amount": {"value": None}, "interest_rate": {"value": ""}},
+    {"loan_amount": {"value": ".5"}, "interest_rate": {"value": "7 percent"}, "loan_term": {"value": "12 mos."}},
+    {"loan_amount": {"value": "1.2.3"}, "interest_rate": {"value": "-1"}, "loan_term": {"value": "60.5"}},
+    {},
+]
+
+
+def test_parse_number():
+    assert parse_number("$25,000.00") == 25000.0
+    assert parse_number("5.99%") == 5.99
+    assert parse_number("60 months") == 60.0
+    assert math.isnan(parse_number(None))
+    assert parse_number("N/A") is None
+
+
+def test_parse_column_matches_parse_number():
+    values = [record.get("loan_amount", {}).get("value") for record in RECORDS]
+    numbers, unparseable = parse_column(values)
+    for value, number, bad in zip(values, numbers, unparseable):
+        expected = parse_number(value)
+        assert bad == (expected is None)
+        if expected is None or math.isnan(expected):
+            assert math.isnan(number)
+        else:
+            assert number == expected
+
+
+@pytest.mark.parametrize("index", range(len(RECORDS)))
+def test_validate_batch_matches_validate(index):
+    validator = Validator()
+    batch = validator.validate_batch(field_columns(RECORDS))
+    single = validator.validate(RECORDS[index])
+    assert bool(batch.valid[index]) == single["valid"]
+    assert len(batch.error_codes(index)) == len(single["errors"])
+
+
+def test_validate_batch_error_codes():
+    batch = Validator().validate_batch(field_columns(RECORDS))
+    assert batch.error_codes(0) == []
+    assert batch.error_codes(1) == ["loan_amount_exceeds_max"]
+    assert sorted(batch.error_codes(2)) == ["interest_rate_exceeds_max", "loan_term_exceeds_max"]
+    assert sorted(batch.error_codes(3)) == ["interest_rate_not_a_number", "loan_amount_not_a_number",
+                                            "loan_term_not_a_number"]
+    assert len(batch) == len(RECORDS)
+    assert batch.counts()["loan_amount_not_a_number"] == 2
+
+
+def test_validate_batch_empty_columns():
+    batch = Validator().validate_batch({})
+    assert len(batch) == 0
+    assert np.array_equal(batch.valid, np.ones(0, dtype=bool))